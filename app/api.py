@@ -14,16 +14,36 @@ import asyncio
 from typing import List, Dict, Any, Tuple
 
 import httpx
+import orjson
 from fastapi import HTTPException
 from email.utils import parsedate_to_datetime
 
+from . import http
+
 BASE_URL = "https://rickandmortyapi.com/api/character"
+PROBE_URL = "https://rickandmortyapi.com/api"
+PROBE_TIMEOUT = 5.0
+PROBE_CACHE_TTL = float(os.getenv("PROBE_CACHE_TTL", "2"))  # seconds; 0 disables
 CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))  # seconds
+# past this fraction of CACHE_TTL, serve the cached data but revalidate in the background
+CACHE_SOFT_TTL_FACTOR = 0.8
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10"))
+BACKOFF_BASE = 0.5  # seconds; first retry waits U(0.5, 1.5)
+BACKOFF_CAP = 8.0
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "10"))  # in-flight page fetches
+# Server-side pre-filter: ~4x fewer pages to fetch. The upstream `species` filter is a
+# partial match (e.g. "Humanoid"), so filter_character_results still checks exactly.
+UPSTREAM_FILTERS: Dict[str, str] = {"species": "Human", "status": "Alive"}
 
 # very simple in-memory cache to avoid hammering upstream on every request
-_cache: Dict[str, Any] = {"ts": 0.0, "data": None}
+# stored as one immutable (monotonic_ts, data) tuple so readers never see a torn pair
+_snapshot: Tuple[float, List[Dict[str, Any]]] | None = None
+# single-flight: the one upstream reload currently running, shared by all misses
+_inflight: "asyncio.Task[List[Dict[str, Any]]] | None" = None
+# last probe result as (monotonic_ts, ok), plus the single in-flight probe
+_probe: Tuple[float, bool] | None = None
+_probe_inflight: "asyncio.Task[bool] | None" = None
 
 log = logging.getLogger(__name__)
 
@@ -42,11 +62,13 @@ def _parse_retry_after(value: str | None) -> float | None:
 
     if not value:
         return None
-    if value.isdigit():
-        return float(value)
+    # Fast path: upstream sends delta-seconds; HTTP-dates are the rare fallback
+    v = value.strip()
+    if v.isascii() and v.isdigit():
+        return float(v)
     try:
         # HTTP-date -> seconds from now
-        dt = parsedate_to_datetime(value)
+        dt = parsedate_to_datetime(v)
         if dt is not None:
             return max(0.0, (dt - dt.now(dt.tzinfo)).total_seconds())
     except Exception:
@@ -54,16 +76,26 @@ def _parse_retry_after(value: str | None) -> float | None:
     return None
 
 
+def _next_backoff(prev: float) -> float:
+    """Return the next "decorrelated jitter" delay: ``min(cap, U(base, prev * 3))``.
+
+    Spreads retries from many workers across time instead of letting them
+    retry in lockstep after a shared 429/5xx.
+    """
+    return min(BACKOFF_CAP, random.uniform(BACKOFF_BASE, prev * 3))  # nosec B311
+
+
 async def _request_with_retry(
     client: httpx.AsyncClient, url: str, params: Dict[str, Any]
 ):
-    """Issue a resilient GET request with exponential backoff and retry.
+    """Issue a resilient GET request with jittered exponential backoff and retry.
 
     Retries on HTTP 429 and 5xx responses, honoring the `Retry-After` header when present,
-    and on common transient network errors (timeouts, transport issues).
+    and on common transient network errors (timeouts, transport issues). Without a
+    `Retry-After`, delays use decorrelated jitter (see `_next_backoff`).
 
     Args:
-        client: An existing `httpx.AsyncClient` to use for the request.
+        client: The `httpx.AsyncClient` to use (normally the shared pooled client).
         url: Target URL to fetch.
         params: Query parameters to include in the GET.
 
@@ -73,7 +105,7 @@ async def _request_with_retry(
     Raises:
         HTTPException: If all retries are exhausted (503).
     """
-    backoff = 0.5
+    backoff = BACKOFF_BASE
     attempt = 0
 
     for attempt in range(1, MAX_RETRIES + 1):
@@ -83,9 +115,9 @@ async def _request_with_retry(
             if r.status_code == 429 or 500 <= r.status_code < 600:
                 ra_hdr = r.headers.get("Retry-After")
                 ra = _parse_retry_after(ra_hdr)
-                delay = (
-                    ra if ra is not None else backoff + random.random() * 0.25
-                )  # nosec B311
+                if ra is None:
+                    backoff = _next_backoff(backoff)
+                delay = ra if ra is not None else backoff
 
                 log.warning(
                     "upstream.retry status=%d attempt=%d/%d url=%s retry_after=%s delay=%.3fs",
@@ -98,7 +130,6 @@ async def _request_with_retry(
                 )
 
                 await asyncio.sleep(delay)
-                backoff = min(backoff * 2, 8.0)
                 continue
 
             r.raise_for_status()
@@ -117,6 +148,7 @@ async def _request_with_retry(
             httpx.RemoteProtocolError,
             httpx.TransportError,
         ) as exc:
+            backoff = _next_backoff(backoff)
             log.warning(
                 "upstream.error attempt=%d/%d url=%s err=%r backoff=%.3fs",
                 attempt,
@@ -126,7 +158,6 @@ async def _request_with_retry(
                 backoff,
             )
             await asyncio.sleep(backoff)
-            backoff = min(backoff * 2, 8.0)
 
     # If we got here, all attempts failed
     log.error(
@@ -145,26 +176,58 @@ async def _request_with_retry(
 # ---------------------------------------------------------------------
 
 
-async def fetch_all_characters() -> List[Dict[str, Any]]:
+async def _fetch_page(
+    sem: asyncio.Semaphore, client: httpx.AsyncClient, page: int
+) -> Dict[str, Any]:
+    """Fetch and decode a single upstream page while holding `sem`."""
+    async with sem:
+        resp = await _request_with_retry(
+            client, BASE_URL, {**UPSTREAM_FILTERS, "page": page}
+        )
+    return orjson.loads(resp.content)
+
+
+async def fetch_all_characters(
+    client: httpx.AsyncClient | None = None,
+) -> List[Dict[str, Any]]:
     """Fetch all characters from the upstream API with pagination and retries.
 
-    Walks through pages until `info.next` is absent. Uses `_request_with_retry`
-    to be resilient to throttling and transient failures.
+    Requests are pre-filtered server-side with `UPSTREAM_FILTERS`. Fetches page 1
+    to learn `info.pages`, then requests the remaining pages concurrently
+    (bounded by `FETCH_CONCURRENCY`); the first page to fail cancels the rest.
+    Each page goes through `_request_with_retry` to be resilient to throttling
+    and transient failures.
+
+    Args:
+        client: Optional client override (e.g., one built on `httpx.MockTransport`);
+            defaults to the shared pooled client.
 
     Returns:
-        A list of raw character dicts as provided by the Rick & Morty API.
+        A list of raw (server-side pre-filtered) character dicts as provided by
+        the Rick & Morty API, in upstream page order.
     """
-    results: List[Dict[str, Any]] = []
-    page = 1
-    async with httpx.AsyncClient() as client:
-        while True:
-            params = {"page": page}
-            resp = await _request_with_retry(client, BASE_URL, params)
-            data = resp.json()
-            results.extend(data.get("results", []))
-            if not (data.get("info") or {}).get("next"):
-                break
-            page += 1
+    client = client or http.get_client()
+    resp = await _request_with_retry(client, BASE_URL, {**UPSTREAM_FILTERS, "page": 1})
+    first = orjson.loads(resp.content)
+    results: List[Dict[str, Any]] = list(first.get("results", []))
+
+    pages = int((first.get("info") or {}).get("pages") or 1)
+    if pages > 1:
+        sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+        # TaskGroup (not gather): once one page exhausts its retries the other
+        # fetches are cancelled instead of retrying against a failing upstream
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(_fetch_page(sem, client, p))
+                    for p in range(2, pages + 1)
+                ]
+        except BaseExceptionGroup as eg:
+            # Callers expect the page's own error (e.g. the 503 HTTPException)
+            raise eg.exceptions[0] from None
+        for task in tasks:
+            results.extend(task.result().get("results", []))
+    log.debug("upstream.fetch_all pages=%d results=%d", pages, len(results))
     return results
 
 
@@ -182,47 +245,96 @@ def filter_character_results(characters: List[Dict[str, Any]]) -> List[Dict[str,
     Returns:
         A list of filtered character dicts with just relevant fields.
     """
-    out: List[Dict[str, Any]] = []
-    for ch in characters:
-        if ch.get("species") != "Human" or ch.get("status") != "Alive":
-            continue
-        origin = (ch.get("origin") or {}).get("name") or ""
-        if origin.startswith("Earth"):
-            out.append(
-                {
-                    "id": ch.get("id"),
-                    "name": ch.get("name"),
-                    "status": ch.get("status"),
-                    "species": ch.get("species"),
-                    "origin": origin,
-                    "image": ch.get("image"),
-                    "url": ch.get("url"),
-                }
-            )
-    return out
+    # Single comprehension: species/status are known constants for kept rows and the
+    # origin name is computed once via the walrus; `id`/`name` are always present upstream.
+    # A missing origin/name short-circuits instead of allocating a `{}`/"" fallback per row.
+    return [
+        {
+            "id": ch["id"],
+            "name": ch["name"],
+            "status": "Alive",
+            "species": "Human",
+            "origin": origin,
+            "image": ch.get("image"),
+            "url": ch.get("url"),
+        }
+        for ch in characters
+        if ch.get("species") == "Human"
+        and ch.get("status") == "Alive"
+        and (o := ch.get("origin"))
+        and (origin := o.get("name"))
+        and origin.startswith("Earth")
+    ]
+
+
+async def _reload() -> List[Dict[str, Any]]:
+    """Fetch + filter from upstream and publish a fresh snapshot."""
+    global _snapshot
+    raw = await fetch_all_characters()
+    filtered = filter_character_results(raw)
+    # We cache the filtered results so we don't have to filter on every request
+    _snapshot = (time.monotonic(), filtered)
+    return filtered
+
+
+def _clear_inflight(task: "asyncio.Task[Any]") -> None:
+    """Free the single-flight slot once `task` is done, unless a newer reload owns it."""
+    global _inflight
+    if _inflight is task:
+        _inflight = None
+
+
+def _start_reload() -> "asyncio.Task[List[Dict[str, Any]]]":
+    """Start the shared reload and publish it as the in-flight task.
+
+    The slot is cleared by a done-callback rather than from inside `_reload`: a
+    task that finishes without suspending (e.g. under an eager task factory)
+    would otherwise clear it before `create_task` returns, and the assignment
+    here would then pin the finished task for good.
+    """
+    global _inflight
+    task = _inflight = asyncio.create_task(_reload())
+    task.add_done_callback(_clear_inflight)
+    return task
+
+
+def _on_background_reload_done(task: "asyncio.Task[Any]") -> None:
+    """Log (and mark retrieved) a failed stale-while-revalidate reload."""
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("upstream.background_reload_failed error=%r", task.exception())
 
 
 async def get_characters() -> List[Dict[str, Any]]:
     """Return filtered characters using a simple in-process cache.
 
     The first call fetches from upstream and caches the filtered results for `CACHE_TTL`
-    seconds. Subsequent calls within the TTL return the cached value.
+    seconds. Within the TTL the cached value is returned; once it is older than
+    `CACHE_SOFT_TTL_FACTOR * CACHE_TTL`, a background reload is started while callers
+    keep getting the (still valid) cached value (stale-while-revalidate). Concurrent
+    misses share a single in-flight reload rather than each walking every page.
 
     Returns:
         Filtered character dicts (list).
     """
-    now = time.time()
-    if _cache["data"] is not None and now - _cache["ts"] < CACHE_TTL:
-        return _cache["data"]
-
-    raw = await fetch_all_characters()
-    filtered = filter_character_results(raw)
-
-    _cache["ts"] = time.time()
-    _cache["data"] = (
-        filtered  # We cache the filtered results so we don't have to filter on every request
-    )
-    return filtered
+    snap = _snapshot
+    if snap is not None:
+        age = time.monotonic() - snap[0]
+        if age < CACHE_TTL * CACHE_SOFT_TTL_FACTOR:
+            return snap[1]
+        if age < CACHE_TTL:
+            if _inflight is None or _inflight.done():
+                _start_reload().add_done_callback(_on_background_reload_done)
+                log.debug("upstream.revalidate age=%.3fs", age)
+            return snap[1]
+
+    task = _inflight
+    # A done task is only waiting for its clear-callback; never re-serve its outcome
+    if task is None or task.done():
+        task = _start_reload()
+    else:
+        log.debug("upstream.cache_miss coalesced=true")
+    # shield: a cancelled caller must not cancel the reload other callers await
+    return await asyncio.shield(task)
 
 
 def cache_info() -> Tuple[bool, float | None]:
@@ -233,21 +345,64 @@ def cache_info() -> Tuple[bool, float | None]:
           * populated (bool): Whether the cache currently has data.
           * age_sec (float | None): Age of the cache in seconds, or None if empty.
     """
-    if _cache["ts"] == 0:
+    snap = _snapshot
+    if snap is None:
         return False, None
-    return (_cache["data"] is not None, round(time.time() - _cache["ts"], 2))
+    return True, round(time.monotonic() - snap[0], 2)
 
 
-async def quick_upstream_probe() -> bool:
+async def quick_upstream_probe(client: httpx.AsyncClient | None = None) -> bool:
     """Perform a lightweight upstream health probe.
 
+    Args:
+        client: Optional client override; defaults to the shared pooled client.
+
     Returns:
         True if the upstream root API endpoint returns HTTP 200,
         otherwise False (including exceptions).
     """
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            r = await client.get("https://rickandmortyapi.com/api")
-            return r.status_code == 200
+        client = client or http.get_client()
+        r = await client.get(PROBE_URL, timeout=PROBE_TIMEOUT)
+        return r.status_code == 200
     except Exception:
         return False
+
+
+async def _reprobe() -> bool:
+    """Run one live probe and publish its result."""
+    global _probe
+    ok = await quick_upstream_probe()
+    _probe = (time.monotonic(), ok)
+    return ok
+
+
+def _clear_probe_inflight(task: "asyncio.Task[Any]") -> None:
+    """Free the probe slot once `task` is done, unless a newer probe owns it."""
+    global _probe_inflight
+    if _probe_inflight is task:
+        _probe_inflight = None
+
+
+async def cached_upstream_probe() -> bool:
+    """Return the upstream probe result, reusing it for `PROBE_CACHE_TTL` seconds.
+
+    Health checks arrive from several probers at once; within the TTL they get
+    the last result, and concurrent callers past it share one live probe
+    (same single-flight scheme as `get_characters`).
+
+    Returns:
+        True if the upstream was reachable on the latest probe.
+    """
+    global _probe_inflight
+    snap = _probe
+    if snap is not None and time.monotonic() - snap[0] < PROBE_CACHE_TTL:
+        return snap[1]
+
+    task = _probe_inflight
+    # Cleared by a done-callback (see `_start_reload`); a done task is stale
+    if task is None or task.done():
+        task = _probe_inflight = asyncio.create_task(_reprobe())
+        task.add_done_callback(_clear_probe_inflight)
+    # shield: a cancelled health request must not cancel the shared probe
+    return await asyncio.shield(task)
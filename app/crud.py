@@ -7,32 +7,24 @@ SQLite (tests/dev) and Postgres (dev/prod).
 
 import logging
 
-from typing import Iterable, List, Dict, Any, Tuple
-from sqlalchemy import select, func, asc, desc
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from sqlalchemy import select, func, asc, desc, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from .models import Character
 
 log = logging.getLogger(__name__)
 
 
-def _row_to_dict(c: Character) -> Dict[str, Any]:
-    """Map a `Character` ORM row to the API response dict shape.
-
-    Args:
-        c: A `Character` ORM instance.
-
-    Returns:
-        A dict containing the public fields for the character.
-    """
-    return {
-        "id": c.id,
-        "name": c.name,
-        "status": c.status,
-        "species": c.species,
-        "origin": c.origin,
-        "image": c.image,
-        "url": c.url,
-    }
+# Columns served by the API; selecting them directly skips ORM hydration
+_PUBLIC_COLUMNS = (
+    Character.id,
+    Character.name,
+    Character.status,
+    Character.species,
+    Character.origin,
+    Character.image,
+    Character.url,
+)
 
 
 async def count_characters(session: AsyncSession) -> int:
@@ -51,28 +43,84 @@ async def count_characters(session: AsyncSession) -> int:
     return total
 
 
+async def characters_nonempty(session: AsyncSession) -> bool:
+    """Return True if at least one character row exists.
+
+    Cheaper than `count_characters` for an emptiness check: ``LIMIT 1`` stops at
+    the first row instead of counting the whole table.
+
+    Args:
+        session: Active async SQLAlchemy session.
+
+    Returns:
+        True if the table has any rows, else False.
+    """
+    q = select(literal(1)).select_from(Character).limit(1)
+    res = await session.execute(q)
+    nonempty = res.first() is not None
+    log.debug("crud.characters_nonempty nonempty=%s", nonempty)
+    return nonempty
+
+
+_UPSERT_COLUMNS = ("name", "status", "species", "origin", "image", "url")
+# Rows per INSERT: 500 x 7 columns stays far below PG's 65535 bind-parameter cap
+_UPSERT_BATCH = 500
+
+
+def _dialect_insert(dialect: str):
+    """Return the dialect-specific `insert()` that supports ON CONFLICT, if any."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert
+    return None
+
+
 async def upsert_characters(
     session: AsyncSession, items: Iterable[Dict[str, Any]]
 ) -> int:
-    """Insert or update characters (portable upsert) and commit.
+    """Insert or update characters in batched statements and commit once.
 
-    Uses `session.merge()` per item for cross-database portability (SQLite & Postgres).
-    Returns the number of processed items (inserted or updated).
+    On Postgres and SQLite this issues one multi-row ``INSERT ... ON CONFLICT
+    (id) DO UPDATE`` per `_UPSERT_BATCH` rows. Other dialects fall back to a per-item
+    `session.merge()`. Duplicate IDs within a batch collapse to the last
+    occurrence, since ON CONFLICT cannot touch the same row twice.
 
     Args:
         session: Active async SQLAlchemy session.
         items: Iterable of character dicts matching the `Character` schema.
 
     Returns:
-        The number of items processed.
+        The number of distinct items processed (inserted or updated).
     """
-    n = 0
-    for it in items:
-        await session.merge(Character(**it))
-        n += 1
+    rows = list({it["id"]: it for it in items}.values())
+    if not rows:
+        log.info("crud.upsert_characters processed=0")
+        return 0
+
+    dialect = session.bind.dialect.name
+    insert_fn = _dialect_insert(dialect)
+    if insert_fn is not None:
+        for i in range(0, len(rows), _UPSERT_BATCH):
+            stmt = insert_fn(Character).values(rows[i : i + _UPSERT_BATCH])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Character.id],
+                set_={
+                    **{c: stmt.excluded[c] for c in _UPSERT_COLUMNS},
+                    "updated_at": func.now(),
+                },
+            )
+            await session.execute(stmt)
+    else:
+        for it in rows:
+            await session.merge(Character(**it))
     await session.commit()
-    log.info("crud.upsert_characters processed=%d", n)
-    return n
+    log.info("crud.upsert_characters processed=%d dialect=%s", len(rows), dialect)
+    return len(rows)
 
 
 async def list_characters(
@@ -81,7 +129,9 @@ async def list_characters(
     order: str,
     page: int,
     page_size: int,
-) -> Tuple[List[Dict[str, Any]], int]:
+    *,
+    with_total: bool = True,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
     """Return a page of characters, sorted in SQL, plus the total row count.
 
     Args:
@@ -90,30 +140,35 @@ async def list_characters(
         order: Sort order: "asc" or "desc".
         page: 1-based page number (>= 1).
         page_size: Number of items per page.
+        with_total: Also run ``COUNT(*)`` for the total. Pass False when the
+            caller already knows the total to save a round trip.
 
     Returns:
         A tuple of (rows, total_count):
           * rows: List of dicts (already paginated & sorted).
-          * total_count: Total number of rows across all pages.
+          * total_count: Total number of rows across all pages, or None when
+            `with_total` is False.
     """
     order_func = asc if order == "asc" else desc
     sort_col = Character.name if sort == "name" else Character.id
 
-    # total count
-    q_total = select(func.count()).select_from(Character)
-    total = int((await session.execute(q_total)).scalar_one())
+    # total count (optional)
+    total: Optional[int] = None
+    if with_total:
+        q_total = select(func.count()).select_from(Character)
+        total = int((await session.execute(q_total)).scalar_one())
 
     # page slice
     q = (
-        select(Character)
+        select(*_PUBLIC_COLUMNS)
         .order_by(order_func(sort_col))
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
     res = await session.execute(q)
-    rows = [_row_to_dict(row[0]) for row in res.fetchall()]
+    rows = [dict(m) for m in res.mappings()]
     log.info(
-        "crud.list_characters sort=%s order=%s page=%d page_size=%d returned=%d total=%d",
+        "crud.list_characters sort=%s order=%s page=%d page_size=%d returned=%d total=%s",
         sort,
         order,
         page,
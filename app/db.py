@@ -8,10 +8,17 @@ Env:
     DATABASE_URL            Async SQLAlchemy URL (e.g., postgresql+asyncpg://...).
                             Defaults to SQLite file DB for dev if not set.
 
-    # Optional Postgres pooling hints (applied only for postgresql URLs)
-    DB_POOL_SIZE            e.g., "5"
-    DB_MAX_OVERFLOW         e.g., "10"
-    DB_POOL_RECYCLE         e.g., "1800"
+    # Postgres pooling (AsyncAdaptedQueuePool; applied only for postgresql URLs)
+    DB_POOL_SIZE            default "10"
+    DB_MAX_OVERFLOW         default "20"
+    DB_POOL_RECYCLE         default "1800" (seconds)
+    DB_POOL_TIMEOUT         default "30" (seconds to wait for a pooled connection)
+    DB_STATEMENT_TIMEOUT    default "5s" (asyncpg only; server-side statement_timeout)
+
+    # Connection liveness
+    DB_POOL_PRE_PING        "1"/"true" (default) to ping connections on checkout;
+                            set "0"/"false" behind PgBouncer transaction pooling,
+                            where the ping leaves server backends idle in transaction
 
     # Optional startup wait/retry controls (used by wait_for_db(); opt-in from main)
     DB_WAIT_FOR_DB          "1"/"true" to enable waiting logic (default "0")
@@ -25,17 +32,22 @@ from __future__ import annotations
 import os
 import asyncio
 import logging
-from typing import AsyncIterator
+import random
+import functools
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import AsyncIterator, Tuple
 
 from sqlalchemy import text, event
 from sqlalchemy.engine.url import make_url, URL
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import StaticPool, NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool, NullPool
 
 log = logging.getLogger(__name__)
 
@@ -58,17 +70,17 @@ class Base(DeclarativeBase):
     pass
 
 
-def _safe_url_parts(url_str: str) -> dict:  # NEW
-    """Parse an SQLAlchemy URL and return non-sensitive parts for logging.
+def _safe_url_parts(url: str | URL) -> dict:
+    """Return the non-sensitive parts of an SQLAlchemy URL for logging.
 
     Args:
-        url_str: SQLAlchemy connection URL string.
+        url: Connection URL string, or an already-parsed `URL` (not re-parsed).
 
     Returns:
         Dict with ``driver``, ``host``, ``port``, and ``database`` keys.
     """
     try:
-        u: URL = make_url(url_str)
+        u = url if isinstance(url, URL) else make_url(url)
         return {
             "driver": u.drivername or "",
             "host": u.host or "",
@@ -79,8 +91,14 @@ def _safe_url_parts(url_str: str) -> dict:  # NEW
         return {"driver": "unknown", "host": "", "port": "", "database": ""}
 
 
-def _register_engine_listeners(eng) -> None:
-    """Attach basic connect/dispose logs; safely no-op for dummy engines."""
+def _register_engine_listeners(eng, parts: dict | None = None) -> None:
+    """Attach basic connect/dispose logs; safely no-op for dummy engines.
+
+    Args:
+        eng: The async engine to instrument.
+        parts: Pre-parsed `_safe_url_parts` for the engine URL; parsed once here
+            if omitted so the per-connection listeners never re-parse it.
+    """
     try:
         sync_eng = eng.sync_engine  # real AsyncEngine has this
     except Exception:
@@ -88,9 +106,11 @@ def _register_engine_listeners(eng) -> None:
         log.debug("db.listeners skipped: engine has no sync_engine (test/dummy)")
         return
 
+    if parts is None:
+        parts = _safe_url_parts(str(eng.url))
+
     @event.listens_for(sync_eng, "connect")
     def _on_connect(dbapi_conn, conn_record):
-        parts = _safe_url_parts(str(eng.url))
         log.info(
             "db.connect driver=%s host=%s port=%s db=%s",
             parts["driver"],
@@ -101,7 +121,6 @@ def _register_engine_listeners(eng) -> None:
 
     @event.listens_for(sync_eng, "engine_disposed")
     def _on_dispose(engine):
-        parts = _safe_url_parts(str(eng.url))
         log.info(
             "db.dispose driver=%s host=%s port=%s db=%s",
             parts["driver"],
@@ -111,48 +130,117 @@ def _register_engine_listeners(eng) -> None:
         )
 
 
-def _mk_engine(url: str):
+@dataclass(frozen=True)
+class _PoolCfg:
+    """Engine tuning parsed from the environment (see module docstring)."""
+
+    pool_pre_ping: bool
+    pool_size: int
+    max_overflow: int
+    pool_recycle: int
+    pool_timeout: float
+    statement_timeout: str
+
+
+@functools.cache
+def _pool_cfg() -> _PoolCfg:
+    """Parse engine tuning env vars once per process.
+
+    Tests that change these env vars call ``_pool_cfg.cache_clear()`` first.
+
+    Returns:
+        The parsed `_PoolCfg`.
+    """
+    return _PoolCfg(
+        pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower()
+        not in ("0", "false", "no"),
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        statement_timeout=os.getenv("DB_STATEMENT_TIMEOUT", "5s"),
+    )
+
+
+def _sqlite_kwargs(u: URL, cfg: _PoolCfg) -> dict:
+    """Pool kwargs for SQLite URLs."""
+    if u.database in (None, "", ":memory:"):
+        # Single-process in-memory DB for tests
+        return {"poolclass": StaticPool}
+    # File-backed SQLite: don't hold file descriptors in a pool
+    return {"poolclass": NullPool}
+
+
+def _pg_kwargs(u: URL, cfg: _PoolCfg) -> dict:
+    """Pool (and, for asyncpg, connection) kwargs for Postgres URLs."""
+    # Explicit async-adapted queue pool (plain QueuePool deadlocks with asyncpg)
+    kwargs: dict = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": cfg.pool_size,
+        "max_overflow": cfg.max_overflow,
+        "pool_recycle": cfg.pool_recycle,
+        "pool_timeout": cfg.pool_timeout,
+    }
+    if u.get_driver_name() == "asyncpg":
+        # Session settings ride in the startup packet, so they cost no extra
+        # round trip: TCP keepalives so sockets dropped by NAT/kube-proxy are
+        # reaped promptly, JIT off (its compile cost dwarfs our short OLTP
+        # queries), a name for pg_stat_activity, and a bound on runaway queries
+        kwargs["connect_args"] = {
+            "server_settings": {
+                "tcp_keepalives_idle": "30",
+                "tcp_keepalives_interval": "10",
+                "tcp_keepalives_count": "3",
+                "jit": "off",
+                "application_name": "rickmorty-sre-demo",
+                "statement_timeout": cfg.statement_timeout,
+            },
+            "timeout": 10.0,
+        }
+    return kwargs
+
+
+# Backend name (URL scheme before "+driver") -> per-backend engine kwargs builder
+_BACKEND_KWARGS = {"sqlite": _sqlite_kwargs, "postgresql": _pg_kwargs}
+
+
+def _mk_engine(url: str | URL, parts: dict | None = None):
     """Build an async engine with sensible defaults per backend.
 
-    Chooses pool classes for SQLite variants and applies optional Postgres
-    pooling hints via environment variables.
+    Dispatches on the URL's backend name: pool classes for SQLite variants and
+    an `AsyncAdaptedQueuePool` for Postgres, sized from environment variables
+    (with defaults). Pre-ping is on
+    unless `DB_POOL_PRE_PING` disables it (e.g., behind PgBouncer; rely on
+    `DB_POOL_RECYCLE` for liveness there).
 
     Args:
-        url: Async SQLAlchemy URL.
+        url: Async SQLAlchemy URL; pass a parsed `URL` to skip re-parsing.
+        parts: Pre-computed `_safe_url_parts(url)`; derived from `url` if omitted.
 
     Returns:
         sqlalchemy.ext.asyncio.AsyncEngine: Configured engine.
     """
-    kwargs: dict = {"pool_pre_ping": True}
+    cfg = _pool_cfg()
+    kwargs: dict = {}
+    if cfg.pool_pre_ping:
+        kwargs["pool_pre_ping"] = True
 
-    if url.startswith("sqlite+aiosqlite:///:memory:"):
-        # Single-process in-memory DB for tests
-        kwargs["poolclass"] = StaticPool
-    elif url.startswith("sqlite+aiosqlite://"):
-        # File-backed SQLite: don't hold file descriptors in a pool
-        kwargs["poolclass"] = NullPool
-    elif url.startswith("postgresql"):
-        # Read pool hints at call time so tests can monkeypatch env
-        pool_size = os.getenv("DB_POOL_SIZE")
-        max_overflow = os.getenv("DB_MAX_OVERFLOW")
-        pool_recycle = os.getenv("DB_POOL_RECYCLE")
-        if pool_size is not None:
-            kwargs["pool_size"] = int(pool_size)
-        if max_overflow is not None:
-            kwargs["max_overflow"] = int(max_overflow)
-        if pool_recycle is not None:
-            kwargs["pool_recycle"] = int(pool_recycle)
-
-    eng = create_async_engine(url, **kwargs)
+    u = url if isinstance(url, URL) else make_url(url)
+    build = _BACKEND_KWARGS.get(u.get_backend_name())
+    if build is not None:
+        kwargs.update(build(u, cfg))
+
+    eng = create_async_engine(u, **kwargs)
+    if parts is None:
+        parts = _safe_url_parts(u)
 
     # Defensive: tests may inject a dummy engine without .sync_engine, or
     # a monkeypatch may intentionally raise. Don’t crash; log and continue.
     try:
-        _register_engine_listeners(eng)
+        _register_engine_listeners(eng, parts)
     except Exception as exc:
         log.debug("db.listeners registration failed: %r", exc)
 
-    parts = _safe_url_parts(url)
     log.debug(
         "db.engine_created driver=%s host=%s port=%s db=%s kwargs=%s",
         parts["driver"],
@@ -165,19 +253,27 @@ def _mk_engine(url: str):
     return eng
 
 
-# Global engine/session factory (reconfigurable in tests)
-engine = _mk_engine(DATABASE_URL)
+def _engine_for(url: str) -> Tuple[AsyncEngine, dict]:
+    """Parse `url` once and build its engine plus its log-safe URL parts."""
+    u = make_url(url)
+    parts = _safe_url_parts(u)
+    return _mk_engine(u, parts), parts
+
+
+# Global engine/session factory (reconfigurable in tests), plus log-safe URL
+# parts for the current engine, parsed once per (re)configuration
+engine, _engine_parts = _engine_for(DATABASE_URL)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
 def configure_engine(url: str) -> None:
     """Reconfigure the global engine/session factory (handy for tests)."""
-    global engine, SessionLocal
-    engine = _mk_engine(url)
+    global engine, SessionLocal, _engine_parts
+    engine, parts = _engine_for(url)
+    _engine_parts = parts
     SessionLocal = async_sessionmaker(
         engine, expire_on_commit=False, class_=AsyncSession
     )
-    parts = _safe_url_parts(url)
     log.info(
         "db.engine_reconfigured driver=%s host=%s port=%s db=%s",
         parts["driver"],
@@ -188,7 +284,12 @@ def configure_engine(url: str) -> None:
 
 
 async def get_session() -> AsyncIterator[AsyncSession]:
-    """FastAPI dependency that yields an `AsyncSession`."""
+    """FastAPI dependency that yields an `AsyncSession`.
+
+    Keep this (and any other dependency touching `SessionLocal`) an ``async def``:
+    FastAPI runs plain ``def`` dependencies in its threadpool, which becomes the
+    bottleneck under concurrency long before the DB pool does.
+    """
     async with SessionLocal() as session:
         yield session
 
@@ -197,7 +298,7 @@ async def init_db() -> None:
     """Create all database tables for registered ORM models."""
     from . import models  # noqa: F401 (import registers metadata)
 
-    parts = _safe_url_parts(str(engine.url))
+    parts = _engine_parts
     log.info(
         "db.init begin driver=%s host=%s port=%s db=%s",
         parts["driver"],
@@ -226,16 +327,57 @@ async def ping_db() -> bool:
         return False
 
 
+async def prewarm_pool(n: int | None = None) -> int:
+    """Open `n` pooled connections concurrently so the pool is hot before traffic.
+
+    Each connection runs ``SELECT 1`` and all are released together, returning
+    to the pool. SQLAlchemy has no ``min_size`` knob, so this is the way to avoid
+    paying connect/TLS/auth cost on the first concurrent requests.
+
+    Args:
+        n: Number of connections to open. Defaults to the pool's ``size()``;
+            pools without one (SQLite's StaticPool/NullPool) are skipped.
+
+    Returns:
+        The number of connections warmed (0 if skipped).
+    """
+    if n is None:
+        size = getattr(engine.pool, "size", None)
+        n = size() if callable(size) else 0
+    if n <= 0:
+        log.debug("db.prewarm skipped pool=%s", type(engine.pool).__name__)
+        return 0
+
+    async with AsyncExitStack() as stack:
+
+        async def _open() -> None:
+            conn = await engine.connect().start()
+            # Registered as soon as it's open, while the stack is still live
+            stack.push_async_callback(conn.close)
+            await conn.execute(text("SELECT 1"))
+
+        # TaskGroup (not gather): if one connect fails the siblings are cancelled
+        # and awaited before the stack unwinds, so none opens after it has closed
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(n):
+                tg.create_task(_open())
+    log.info("db.prewarm connections=%d", n)
+    return n
+
+
 async def wait_for_db(
     *,
     max_attempts: int = DB_WAIT_MAX_ATTEMPTS,
     backoff_start: float = DB_WAIT_BACKOFF_START,
     backoff_max: float = DB_WAIT_BACKOFF_MAX,
 ) -> None:
-    """Poll the database until `ping_db()` returns True or attempts are exhausted."""
+    """Poll the database until `ping_db()` returns True or attempts are exhausted.
+
+    Sleeps between attempts use capped exponential backoff with +/-25% jitter.
+    """
     attempt = 0
     delay = backoff_start
-    parts = _safe_url_parts(str(engine.url))
+    parts = _engine_parts
     log.info(
         "db.wait start attempts=%d backoff_start=%.3fs backoff_max=%.3fs target=%s@%s:%s/%s",
         max_attempts,
@@ -253,5 +395,6 @@ async def wait_for_db(
         attempt += 1
         if attempt >= max_attempts:
             raise RuntimeError(f"Database not ready after {max_attempts} attempts")
-        await asyncio.sleep(delay)
+        # +/-25% jitter so replicas starting together don't retry in lockstep
+        await asyncio.sleep(random.uniform(delay * 0.75, delay * 1.25))  # nosec B311
         delay = min(delay * 2.0, backoff_max)
@@ -0,0 +1,64 @@
+"""Shared upstream HTTP client.
+
+Holds a single pooled `httpx.AsyncClient` for all Rick & Morty API traffic so
+requests reuse keep-alive (and HTTP/2) connections instead of paying a fresh
+TCP+TLS handshake per call. The client is created lazily on first use and
+closed from the application lifespan on shutdown.
+"""
+
+import os
+import logging
+
+import httpx
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10"))
+
+# Mirrors aiohttp's TCPConnector(limit_per_host=20, keepalive_timeout=30). httpx
+# has no per-host cap, but everything goes to a single upstream host, so the
+# overall `max_connections` is the per-host limit; `max_keepalive_connections`
+# only bounds how many idle connections are kept open.
+_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0,
+)
+
+# Upstream JSON pages compress well; httpx decodes br via the `brotli` package
+_HEADERS = {
+    "Accept-Encoding": "gzip, br",
+    "User-Agent": "rickmorty-sre-demo",
+}
+
+_client: httpx.AsyncClient | None = None
+
+log = logging.getLogger(__name__)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide upstream client, creating it on first use.
+
+    Returns:
+        The shared `httpx.AsyncClient`.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(REQUEST_TIMEOUT),
+            limits=_LIMITS,
+            headers=_HEADERS,
+        )
+        log.debug("http.client_created http2=true timeout=%.3fs", REQUEST_TIMEOUT)
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client (if any) and drop the reference.
+
+    Safe to call multiple times; the next `get_client()` builds a fresh client.
+    """
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+        log.debug("http.client_closed")
@@ -8,9 +8,12 @@ refresh and try again later.
 
 import os
 import time
+import asyncio
+import hashlib
 import logging
 from contextlib import asynccontextmanager, suppress
 
+import orjson
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,7 +23,14 @@ from .page_cache import page_cache
 log = logging.getLogger(__name__)
 
 REFRESH_TTL = int(os.getenv("REFRESH_TTL", "600"))  # seconds
+# time.monotonic() of the last successful sync/refresh; immune to wall-clock jumps
 _last_refresh_ts: float | None = None
+# Serializes seed/refresh within this process so concurrent callers can't both pass
+# the staleness/emptiness check and duplicate the upstream fetch + upsert.
+# (The PG advisory locks only coordinate across pods.)
+_refresh_lock = asyncio.Lock()
+# Content digest of the last upstream payload that was successfully upserted
+_last_digest: bytes | None = None
 
 
 def last_refresh_age() -> float | None:
@@ -32,24 +42,65 @@ def last_refresh_age() -> float | None:
     """
     if _last_refresh_ts is None:
         return None
-    return round(time.time() - _last_refresh_ts, 2)
+    return round(time.monotonic() - _last_refresh_ts, 2)
+
+
+def is_stale() -> bool:
+    """Return True if a refresh is due (never refreshed, or older than `REFRESH_TTL`).
+
+    A cheap in-memory check so callers can skip opening a session when there is
+    nothing to do; `refresh_if_stale` re-checks under its lock.
+    """
+    ts = _last_refresh_ts
+    return ts is None or (time.monotonic() - ts) > REFRESH_TTL
+
+
+def _digest(raw: list) -> bytes:
+    """Return a cheap content digest of the raw upstream payload.
+
+    Args:
+        raw: Character dicts as returned by `api.fetch_all_characters`.
+
+    Returns:
+        A 16-byte BLAKE2b digest of the JSON-encoded payload.
+    """
+    return hashlib.blake2b(orjson.dumps(raw), digest_size=16).digest()
+
+
+def _is_postgres(session: AsyncSession) -> bool:
+    """Return True if the session is bound to a Postgres engine."""
+    bind = getattr(session, "bind", None)
+    return getattr(getattr(bind, "dialect", None), "name", None) == "postgresql"
 
 
 @asynccontextmanager
 async def _pg_advisory_lock(session: AsyncSession, key: int):
-    """Try to acquire a Postgres advisory lock; yield True if held.
+    """Try to acquire a transaction-scoped Postgres advisory lock; yield True if held.
+
+    Uses ``pg_try_advisory_xact_lock`` so the lock is released by the session's
+    COMMIT/ROLLBACK (e.g., the commit in `crud.upsert_characters`) — no unlock
+    round trip, and no leaked lock if the task is cancelled mid-await. If the
+    body returns without committing, the open transaction is rolled back on exit.
 
-    On non-Postgres engines (e.g., SQLite) — or if pg_* functions are unavailable —
-    this context manager yields True and performs no locking.
+    On non-Postgres engines (e.g., SQLite) this yields True immediately without
+    issuing any SQL. On Postgres, if the pg_* functions fail, it also proceeds
+    unlocked (yields True).
     """
+    if not _is_postgres(session):
+        log.debug("advisory_lock key=%s skipped: not postgres", hex(key))
+        yield True
+        return
+
     have = True
     try:
-        res = await session.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key})
+        res = await session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": key}
+        )
         scalar = res.scalar()
         have = bool(scalar) if scalar is not None else True
         log.debug("advisory_lock key=%s acquired=%s", hex(key), have)
     except Exception:
-        # Non-PG or no function — proceed unlocked (safe in single-writer tests/dev).
+        # No function / permission issue — proceed unlocked (single-writer fallback).
         have = True
         log.debug(
             "advisory_lock key=%s not supported on this engine; proceeding", hex(key)
@@ -57,10 +108,11 @@ async def _pg_advisory_lock(session: AsyncSession, key: int):
     try:
         yield have
     finally:
-        if have:
-            with suppress(Exception):
-                await session.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": key})
-                log.debug("advisory_lock key=%s released", hex(key))
+        # Ends the lock's transaction on paths that didn't commit (skips/errors)
+        with suppress(Exception):
+            if session.in_transaction():
+                await session.rollback()
+                log.debug("advisory_lock key=%s released via rollback", hex(key))
 
 
 async def initial_sync_if_empty(session: AsyncSession) -> int:
@@ -75,14 +127,13 @@ async def initial_sync_if_empty(session: AsyncSession) -> int:
         Number of items processed (0 if the table was already populated).
     """
     SEED_LOCK_KEY = 0xC0FFEE  # Only one pod seeds at a time
-    async with _pg_advisory_lock(session, SEED_LOCK_KEY) as have_lock:
+    async with _refresh_lock, _pg_advisory_lock(session, SEED_LOCK_KEY) as have_lock:
         if not have_lock:
             log.debug("initial_sync skipped: lock held by another instance")
             return 0
 
-        count = await crud.count_characters(session)
-        if count > 0:
-            log.debug("initial_sync skipped: table already populated (rows=%d)", count)
+        if await crud.characters_nonempty(session):
+            log.debug("initial_sync skipped: table already populated")
             return 0
 
         log.info("initial_sync starting: empty table detected")
@@ -90,6 +141,9 @@ async def initial_sync_if_empty(session: AsyncSession) -> int:
         filtered = api.filter_character_results(raw)
         n = await crud.upsert_characters(session, filtered)
 
+        global _last_digest
+        _last_digest = _digest(raw)
+
         # Invalidate per-pod page cache AFTER commit
         if n:
             try:
@@ -99,7 +153,7 @@ async def initial_sync_if_empty(session: AsyncSession) -> int:
                 log.debug("ingest.cache invalidate_failed error=%r", exc)
 
         global _last_refresh_ts
-        _last_refresh_ts = time.time()
+        _last_refresh_ts = time.monotonic()
         log.info(
             "initial_sync complete: fetched=%d filtered=%d upserted=%d",
             len(raw),
@@ -120,39 +174,51 @@ async def refresh_if_stale(session: AsyncSession) -> int:
     Returns:
         Number of items processed when a refresh occurs, or 0 if still fresh.
     """
-    global _last_refresh_ts
-    now = time.time()
-    age = None if _last_refresh_ts is None else round(now - _last_refresh_ts, 2)
-
-    if _last_refresh_ts is not None and (now - _last_refresh_ts) <= REFRESH_TTL:
-        log.debug("refresh skipped: still fresh (age=%ss ttl=%ss)", age, REFRESH_TTL)
-        return 0
-
-    REFRESH_LOCK_KEY = 0xBEEFED  # Only one pod refreshes at a time
-    async with _pg_advisory_lock(session, REFRESH_LOCK_KEY) as have_lock:
-        if not have_lock:
-            log.debug("refresh skipped: lock held by another instance")
+    global _last_refresh_ts, _last_digest
+    async with _refresh_lock:
+        # Check staleness under the lock so waiters see a refresh that just finished
+        now = time.monotonic()
+        age = None if _last_refresh_ts is None else round(now - _last_refresh_ts, 2)
+
+        if _last_refresh_ts is not None and (now - _last_refresh_ts) <= REFRESH_TTL:
+            log.debug(
+                "refresh skipped: still fresh (age=%ss ttl=%ss)", age, REFRESH_TTL
+            )
             return 0
 
-        log.info("refresh starting: age=%s ttl=%s", age, REFRESH_TTL)
-        raw = await api.fetch_all_characters()
-        filtered = api.filter_character_results(raw)
-        n = await crud.upsert_characters(session, filtered)
-
-        # Invalidate per-pod page cache AFTER commit (only if data changed)
-        if n:
-            try:
-                page_cache.invalidate_all()
-                log.debug("ingest.cache cleared after refresh (upserted=%d)", n)
-            except Exception as exc:
-                log.debug("ingest.cache invalidate_failed error=%r", exc)
-        _last_refresh_ts = time.time()
-
-        log.info(
-            "refresh complete: fetched=%d filtered=%d upserted=%d age_before=%s",
-            len(raw),
-            len(filtered),
-            n,
-            age,
-        )
-        return n
+        REFRESH_LOCK_KEY = 0xBEEFED  # Only one pod refreshes at a time
+        async with _pg_advisory_lock(session, REFRESH_LOCK_KEY) as have_lock:
+            if not have_lock:
+                log.debug("refresh skipped: lock held by another instance")
+                return 0
+
+            log.info("refresh starting: age=%s ttl=%s", age, REFRESH_TTL)
+            raw = await api.fetch_all_characters()
+            digest = _digest(raw)
+            if digest == _last_digest:
+                # Upstream unchanged since our last upsert: skip filter + DB writes
+                _last_refresh_ts = time.monotonic()
+                log.info("refresh unchanged: fetched=%d upserted=0", len(raw))
+                return 0
+
+            filtered = api.filter_character_results(raw)
+            n = await crud.upsert_characters(session, filtered)
+            _last_digest = digest
+
+            # Invalidate per-pod page cache AFTER commit (only if data changed)
+            if n:
+                try:
+                    page_cache.invalidate_all()
+                    log.debug("ingest.cache cleared after refresh (upserted=%d)", n)
+                except Exception as exc:
+                    log.debug("ingest.cache invalidate_failed error=%r", exc)
+            _last_refresh_ts = time.monotonic()
+
+            log.info(
+                "refresh complete: fetched=%d filtered=%d upserted=%d age_before=%s",
+                len(raw),
+                len(filtered),
+                n,
+                age,
+            )
+            return n
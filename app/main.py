@@ -8,16 +8,17 @@ and the public REST endpoints:
 - GET /characters  -> paginated/sorted characters from the DB
 """
 
-import math
 import os
 import asyncio
+import hashlib
 import logging
 from contextlib import asynccontextmanager, suppress
 
-from typing import Any
+from typing import Any, Literal
+import orjson
 from fastapi import FastAPI, HTTPException, Query, Depends, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy.exc import (
     OperationalError,
     InterfaceError,
@@ -26,9 +27,10 @@ from sqlalchemy.exc import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from . import api, crud, ingest
-from .db import get_session, init_db, wait_for_db
+from . import api, crud, db, http, ingest
+from .db import get_session, init_db, prewarm_pool, wait_for_db
 from .page_cache import page_cache
+from .problem import PROBLEM_MEDIA_TYPE, problem_body
 from .schemas import CharactersPage, HealthcheckOut, ProblemDetail
 from .metrics import (
     install as install_metrics,
@@ -38,6 +40,7 @@ from .metrics import (
     record_cache_error,
 )
 from .logging_config import configure_logging
+from .ratelimit import RATE_LIMIT_BURST, RATE_LIMIT_RPS, TokenBucketMiddleware
 
 configure_logging()
 log = logging.getLogger(__name__)
@@ -48,61 +51,45 @@ log = logging.getLogger(__name__)
 
 app = FastAPI(title="Rick & Morty Characters", version="0.6.0")
 
+# Middleware added later wraps earlier ones: add the limiter first so the metrics
+# middleware sits outside it and counts rejected (429) requests too
+if RATE_LIMIT_RPS > 0:
+    app.add_middleware(
+        TokenBucketMiddleware, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST
+    )
+    log.info("ratelimit enabled rps=%.3f burst=%.0f", RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+
 install_metrics(app)
 log.info("Metrics installed")
 
-_STATUS_TITLES = {
-    400: "Bad Request",
-    401: "Unauthorized",
-    403: "Forbidden",
-    404: "Not Found",
-    422: "Unprocessable Entity",
-    500: "Internal Server Error",
-    503: "Service Unavailable",
-}
-
 
 def _problem(
     status: int,
     title: str | None = None,
     detail: str | None = None,
     instance: str | None = None,
-) -> JSONResponse:
-    """Return an RFC7807 problem+json response."""
-    body = {
-        "type": "about:blank",
-        "title": title or _STATUS_TITLES.get(status, "Error"),
-        "status": status,
-        "detail": detail,
-        "instance": instance,
-    }
-    return JSONResponse(
-        status_code=status, content=body, media_type="application/problem+json"
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Return an RFC7807 problem+json response (body from `problem.problem_body`)."""
+    return Response(
+        content=problem_body(status, title, detail, instance),
+        status_code=status,
+        media_type=PROBLEM_MEDIA_TYPE,
+        headers=headers,
     )
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(_req: Request, exc: HTTPException):
     detail = exc.detail if isinstance(exc.detail, str) else None
-    body = {
-        "type": "about:blank",
-        "title": _STATUS_TITLES.get(exc.status_code, "Error"),
-        "status": exc.status_code,
-        "detail": detail,
-        "instance": None,
-    }
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=body,
-        media_type="application/problem+json",
-        headers=exc.headers or None,
-    )
+    return _problem(exc.status_code, detail=detail, headers=exc.headers or None)
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(_req: Request, exc: RequestValidationError):
-    msg = exc.errors()[0]["msg"] if exc.errors() else "Validation error"
-    return _problem(status=422, title=_STATUS_TITLES[422], detail=msg)
+    errors = exc.errors()  # builds a fresh list on every call
+    msg = errors[0]["msg"] if errors else "Validation error"
+    return _problem(status=422, detail=msg)
 
 
 # ---------------------------------------------------------------------
@@ -121,15 +108,30 @@ async def lifespan(app: FastAPI):
         # Let startup fail so K8s can restart us (or backoff)
         raise
 
+    # Eager tasks run synchronously until their first real await, so requests that
+    # never block (page-cache hits, /healthz) skip a loop scheduling hop.
+    # asyncio.eager_task_factory is Python 3.12+; older interpreters keep the default.
+    loop = asyncio.get_running_loop()
+    prev_factory = loop.get_task_factory()
+    eager_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_factory is not None:
+        loop.set_task_factory(eager_factory)
+        log.info("startup.eager_task_factory enabled")
+
     # 2) Create/upgrade schema
     await init_db()
     log.info("startup.db_init complete")
 
+    # Open pooled connections now rather than on the first requests (best effort)
+    try:
+        await prewarm_pool()
+    except Exception as e:
+        log.warning("startup.db_prewarm_failed error=%r", e)
+
     # 3) Seed once if empty (guarded by advisory-lock in ingest)
-    async for session in get_session():
+    async with db.SessionLocal() as session:
         n = await ingest.initial_sync_if_empty(session)
         log.info("startup.initial_sync_if_empty upserted=%d", n)
-        break
 
     # 4) Optional background refresher (we could move this to a cron /
     # dedicated microservice in prod)
@@ -143,19 +145,24 @@ async def lifespan(app: FastAPI):
 
         async def _refresher():
             while not stop_event.is_set():
-                async for s in get_session():
+                # Tick cadence is measured from the start of each cycle, so a slow
+                # refresh doesn't push every later tick back by its duration
+                next_tick = loop.time() + interval
+                # Only open a session when there is work to do
+                if ingest.is_stale():
                     try:
-                        n = await ingest.refresh_if_stale(s)
+                        async with db.SessionLocal() as s:
+                            n = await ingest.refresh_if_stale(s)
                         if n:
                             log.info("refresh_worker.cycle upserted=%d", n)
                     except Exception as exc:
                         # keep going; we don't want the task to die
                         log.warning("refresh_worker.error error=%r", exc)
-                    break
-                try:
-                    await asyncio.wait_for(stop_event.wait(), timeout=interval)
-                except asyncio.TimeoutError:
-                    continue
+                # Sleep until the next tick or until shutdown; timeout_at takes the
+                # absolute deadline directly and wraps no extra Task per tick
+                with suppress(TimeoutError):
+                    async with asyncio.timeout_at(next_tick):
+                        await stop_event.wait()
 
         task = asyncio.create_task(_refresher())
 
@@ -167,6 +174,8 @@ async def lifespan(app: FastAPI):
             task.cancel()
             with suppress(asyncio.CancelledError):
                 await task
+        await http.close_client()
+        loop.set_task_factory(prev_factory)
 
 
 app.router.lifespan_context = lifespan
@@ -195,6 +204,76 @@ _common_error_responses: dict[int | str, dict[str, Any]] = {
     },
 }
 
+
+def _json(body: bytes, cache: str | None = None, etag: str | None = None) -> Response:
+    """Wrap pre-encoded JSON bytes in a plain response.
+
+    Returning a `Response` makes FastAPI skip `response_model` validation and
+    re-encoding; the model is still used for the OpenAPI schema.
+
+    Args:
+        body: Encoded JSON bytes.
+        cache: Optional page-cache outcome ("HIT"/"MISS") for the X-Cache header.
+        etag: Optional entity tag for the ETag header.
+    """
+    headers = {}
+    if cache:
+        headers["X-Cache"] = cache
+    if etag:
+        headers["ETag"] = etag
+    return Response(
+        content=body, media_type="application/json", headers=headers or None
+    )
+
+
+def _page_envelope(
+    page: int, page_size: int, total_count: int, rows: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Build the `CharactersPage` payload (keys in schema order) for one page.
+
+    Pages past the end are flagged ``out_of_range`` and carry no results.
+    """
+    total_pages = -(-total_count // page_size) if total_count else 0
+    out_of_range = page > total_pages if total_pages else page > 1
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total_count": total_count,
+        "total_pages": total_pages,
+        "has_prev": page > 1 and not out_of_range,
+        "has_next": page < total_pages,
+        "out_of_range": out_of_range,
+        "results": [] if out_of_range else rows,
+    }
+
+
+def _etag(body: bytes) -> str:
+    """Strong entity tag from the body's content; identical across pods."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match matches `etag`.
+
+    Weak comparison (RFC 9110): a ``W/`` prefix is ignored and ``*`` matches.
+    """
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    return any(
+        t == "*" or t.removeprefix("W/") == etag
+        for t in (t.strip() for t in inm.split(","))
+    )
+
+
+def _page_response(request: Request, cached: tuple[bytes, str], cache: str):
+    """Serve a cached (body, etag) page, or 304 if the client already has it."""
+    body, etag = cached
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "X-Cache": cache})
+    return _json(body, cache=cache, etag=etag)
+
+
 # ---------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------
@@ -202,8 +281,20 @@ _common_error_responses: dict[int | str, dict[str, Any]] = {
 
 @app.get("/", include_in_schema=False)
 async def root(_request: Request):
-    """Redirect the root path to the interactive API docs (/docs)."""
-    return RedirectResponse(url=app.docs_url or "/docs", status_code=307)
+    """Redirect the root path to the interactive API docs (/docs).
+
+    308 is permanent and cacheable, so browsers and the ingress/CDN can answer
+    repeat hits without reaching the app.
+    """
+    return RedirectResponse(
+        url=app.docs_url or "/docs",
+        status_code=308,
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
+
+
+# Probed every few seconds by kubelet; encode the constant body once
+_HEALTHZ_BODY = orjson.dumps({"status": "ok"})
 
 
 @app.get("/healthz", include_in_schema=False)
@@ -213,7 +304,7 @@ async def healthz():
     Always returns 200 if the app can serve requests.
     Safe for liveness/readiness probes without hitting DB or network.
     """
-    return {"status": "ok"}
+    return Response(content=_HEALTHZ_BODY, media_type="application/json")
 
 
 @app.get(
@@ -222,15 +313,19 @@ async def healthz():
 )
 async def healthcheck(request: Request, session: AsyncSession = Depends(get_session)):
     """Deep health check for upstream API and database."""
-    upstream_ok = await api.quick_upstream_probe()
+    # Independent resources: wait for max(probe, count) rather than their sum
+    upstream_ok, total = await asyncio.gather(
+        api.cached_upstream_probe(),
+        crud.count_characters(session),
+        return_exceptions=True,
+    )
+    upstream_ok = upstream_ok is True
 
     db_ok = True
-    total = 0
-    try:
-        total = await crud.count_characters(session)
-    except Exception as exc:
+    if isinstance(total, BaseException):
         db_ok = False
-        log.debug("route.healthcheck.db_error error=%r", exc)
+        log.debug("route.healthcheck.db_error error=%r", total)
+        total = 0
     status = "ok" if (upstream_ok and db_ok) else "degraded"
     log.info(
         "route.healthcheck status=%s upstream_ok=%s db_ok=%s character_count=%d",
@@ -248,7 +343,7 @@ async def healthcheck(request: Request, session: AsyncSession = Depends(get_sess
         "upstream_ok": upstream_ok,
         "db_ok": db_ok,
         "character_count": total,
-        "last_refresh_age": ingest.last_refresh_age(),
+        "last_refresh_age": age,
     }
 
 
@@ -259,8 +354,8 @@ async def healthcheck(request: Request, session: AsyncSession = Depends(get_sess
 )
 async def characters(
     request: Request,
-    sort: str = Query("id", pattern=r"^(id|name)$"),
-    order: str = Query("asc", pattern=r"^(asc|desc)$"),
+    sort: Literal["id", "name"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     session: AsyncSession = Depends(get_session),
@@ -273,8 +368,11 @@ async def characters(
       3) Re-check cache after acquiring the lock.
       4) On miss, query the DB, build the response, store, and return.
 
+    Every response carries a content-hash ETag; a matching ``If-None-Match``
+    gets an empty 304 instead of the body.
+
     Args:
-        request: Incoming FastAPI request (unused; reserved for future).
+        request: Incoming FastAPI request (read for ``If-None-Match``).
         sort: Sort field, one of {"id","name"}.
         order: Sort order, one of {"asc","desc"}.
         page: 1-based page number.
@@ -282,7 +380,9 @@ async def characters(
         session: Async SQLAlchemy session.
 
     Returns:
-        CharactersPage JSON object (possibly served from the cache).
+        CharactersPage JSON (possibly served from the cache), pre-serialized with
+        orjson so the response model is only used for the OpenAPI schema, or a
+        304 Not Modified.
     """
     key = page_cache.key(sort, order, page, page_size)
 
@@ -296,8 +396,9 @@ async def characters(
 
     if cached is not None:
         record_cache_hit()
-        log.info("route.characters cache_hit key=%s", key)
-        return cached
+        # DEBUG: hits are the hot path and already counted by page_cache_hits_total
+        log.debug("route.characters cache_hit key=%s", key)
+        return _page_response(request, cached, "HIT")
 
     # -------- Singleflight around DB work --------
     lock = page_cache.lock_for(key)
@@ -317,13 +418,18 @@ async def characters(
         if cached is not None:
             record_cache_hit()
             log.debug("route.characters cache_hit_after_lock key=%s", key)
-            return cached
+            return _page_response(request, cached, "HIT")
 
-        # Miss -> query DB
+        # Miss -> query DB; the total is shared by every page, so COUNT(*) only
+        # runs when no fresh total is cached (ingest invalidates it with the pages)
+        total_count = page_cache.get_total()
         try:
-            rows, total_count = await crud.list_characters(
-                session, sort, order, page, page_size
+            rows, fetched_total = await crud.list_characters(
+                session, sort, order, page, page_size, with_total=total_count is None
             )
+            if total_count is None:
+                total_count = fetched_total
+                page_cache.put_total(total_count)
 
         except ValueError as exc:
             # somehow the client sent an invalid sort/order -> 400
@@ -367,11 +473,7 @@ async def characters(
                 status_code=500, detail="Internal server error."
             ) from exc
 
-        total_pages = math.ceil(total_count / page_size) if total_count else 0
-        out_of_range = (total_pages > 0 and page > total_pages) or (
-            total_pages == 0 and page > 1
-        )
-
+        resp = _page_envelope(page, page_size, total_count, rows)
         log.info(
             "route.characters sort=%s order=%s page=%d page_size=%d returned=%d total=%d pages=%d out_of_range=%s",
             sort,
@@ -380,26 +482,18 @@ async def characters(
             page_size,
             len(rows),
             total_count,
-            total_pages,
-            out_of_range,
+            resp["total_pages"],
+            resp["out_of_range"],
         )
 
-        resp = {
-            "page": page,
-            "page_size": page_size,
-            "total_count": total_count,
-            "total_pages": total_pages,
-            "has_prev": (page > 1) and not out_of_range,
-            "has_next": (page < total_pages),
-            "out_of_range": out_of_range,
-            "results": [] if out_of_range else rows,
-        }
-
+        # Cache the serialized body (and its ETag) so hits skip re-encoding/hashing
+        body = orjson.dumps(resp)
+        entry = (body, _etag(body))
         try:
-            page_cache.put(key, resp)
+            page_cache.put(key, entry)
             record_cache_put()
         except Exception as exc:
             record_cache_error("put")
             log.warning("route.characters page_cache_put_error key=%s err=%r", key, exc)
 
-        return resp
+        return _page_response(request, entry, "MISS")
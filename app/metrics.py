@@ -1,6 +1,6 @@
 import time
-from typing import Optional
-from fastapi import FastAPI, Request, Response
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import FastAPI, Response
 from prometheus_client import (
     Counter,
     Gauge,
@@ -58,24 +58,69 @@ def observe_health(db_ok: bool, upstream_ok: bool, age: Optional[float]) -> None
 
 
 # --- Installation: middleware + /metrics endpoint ---
-def install(app: FastAPI) -> None:
-    @app.middleware("http")
-    async def _metrics_mw(request: Request, call_next):
+# Path label for requests no FastAPI route matched (404s, docs/static mounts)
+UNMATCHED_PATH = "__other__"
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """Pure-ASGI request counter/latency middleware.
+
+    Unlike ``@app.middleware("http")`` (Starlette's BaseHTTPMiddleware), this
+    adds no task group or request/response re-wrapping per call: it only
+    watches the ``http.response.start`` message for the status code.
+
+    Bound label children are cached per ``(path, method, status)`` so the hot
+    path skips prometheus_client's label validation and lookup; route-template
+    labels keep this table as small as the metric itself.
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]]):
+        self.app = app
+        self._children: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+
+    def _bound(self, path: str, method: str, status: int) -> Tuple[Any, Any]:
+        """Return the (latency, counter) children for one label set, binding once."""
+        key = (path, method, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                REQUEST_LATENCY.labels(path=path, method=method),
+                REQUESTS.labels(path=path, method=method, status=str(status)),
+            )
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # if the app raises before starting a response
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
         t0 = time.perf_counter()
         try:
-            response = await call_next(request)
-            status = getattr(response, "status_code", 500)
-            return response
+            await self.app(scope, receive, send_wrapper)
         finally:
             dur = time.perf_counter() - t0
-            REQUEST_LATENCY.labels(
-                path=request.url.path, method=request.method
-            ).observe(dur)
-            REQUESTS.labels(
-                path=request.url.path,
-                method=request.method,
-                status=str(locals().get("status", 500)),
-            ).inc()
+            # Label by the matched route template (the router sets scope["route"]),
+            # never the raw URL, so 404 scans can't mint unbounded series
+            path = getattr(scope.get("route"), "path", UNMATCHED_PATH)
+            latency, count = self._bound(path, scope["method"], status)
+            latency.observe(dur)
+            count.inc()
+
+
+def install(app: FastAPI) -> None:
+    app.add_middleware(MetricsMiddleware)
 
     @app.get("/metrics", include_in_schema=False)
     async def metrics():
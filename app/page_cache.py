@@ -4,66 +4,94 @@ from __future__ import annotations
 import os
 import time
 import asyncio
+import weakref
 from collections import OrderedDict
-from typing import NamedTuple, Dict, Tuple, Optional
+from typing import Any, Callable, Dict, Tuple, Optional
 
-
-class PageKey(NamedTuple):
-    """Structured cache key for a paged /characters response."""
-
-    sort: str
-    order: str
-    page: int
-    page_size: int
+# Cache key for a paged /characters response: (sort, order, page, page_size).
+# A plain tuple hashes like a NamedTuple but is cheaper to build per request.
+PageKey = Tuple[str, str, int, int]
 
 
 class PageCache:
     """Tiny per-pod LRU+TTL cache with per-key singleflight locks.
 
-    Stores full /characters responses keyed by (sort, order, page, page_size).
+    Stores full /characters responses (serialized JSON bytes plus ETag) keyed by
+    (sort, order, page, page_size), plus the table's total row count, which is
+    the same for every page and so is shared across keys.
     """
 
-    def __init__(self, ttl: float, capacity: int) -> None:
+    def __init__(
+        self,
+        ttl: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         """Initialize the cache.
 
         Args:
             ttl: Time-to-live in seconds for cached entries.
             capacity: Maximum number of page entries to store (LRU-evicted).
+            clock: Monotonic time source (injectable for tests).
         """
         self._ttl = ttl
         self._cap = capacity
-        self._store: "OrderedDict[PageKey, Tuple[float, Dict]]" = OrderedDict()
-        self._locks: Dict[PageKey, asyncio.Lock] = {}
+        self._clock = clock
+        # key -> (expires_at, value); expiry is computed once at put() time
+        self._store: "OrderedDict[PageKey, Tuple[float, Any]]" = OrderedDict()
+        # Weak values: a lock lives only while some caller holds it, so scanning
+        # many distinct pages can't grow this map without bound
+        self._locks: "weakref.WeakValueDictionary[PageKey, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        # (expires_at, total_count) shared by all pages; cleared with them
+        self._total: Optional[Tuple[float, int]] = None
 
     def key(self, sort: str, order: str, page: int, page_size: int) -> PageKey:
-        """Build a structured key for a page."""
-        return PageKey(sort, order, page, page_size)
+        """Build the cache key for a page."""
+        return (sort, order, page, page_size)
 
-    def get(self, key: PageKey) -> Optional[Dict]:
+    def get(self, key: PageKey) -> Optional[Any]:
         """Return cached value if fresh; otherwise evict and return None."""
-        ts_val = self._store.get(key)
-        if not ts_val:
+        entry = self._store.get(key)
+        if entry is None:
             return None
-        ts, val = ts_val
-        if time.time() - ts > self._ttl:
-            self._store.pop(key, None)
+        expires_at, val = entry
+        if self._clock() > expires_at:
+            del self._store[key]
             return None
         self._store.move_to_end(key)  # LRU bump
         return val
 
-    def put(self, key: PageKey, value: Dict) -> None:
+    def put(self, key: PageKey, value: Any) -> None:
         """Insert or refresh a cache entry and enforce LRU capacity."""
-        self._store[key] = (time.time(), value)
+        self._store[key] = (self._clock() + self._ttl, value)
         self._store.move_to_end(key)
         while len(self._store) > self._cap:
             self._store.popitem(last=False)
 
+    def get_total(self) -> Optional[int]:
+        """Return the cached total row count if fresh, else None."""
+        entry = self._total
+        if entry is None or self._clock() > entry[0]:
+            return None
+        return entry[1]
+
+    def put_total(self, total: int) -> None:
+        """Cache the total row count for `ttl` seconds."""
+        self._total = (self._clock() + self._ttl, total)
+
     def invalidate_all(self) -> None:
-        """Clear the entire page cache."""
+        """Clear the entire page cache (pages and the cached total)."""
         self._store.clear()
+        self._total = None
 
     def lock_for(self, key: PageKey) -> asyncio.Lock:
-        """Return the per-key singleflight lock (create if absent)."""
+        """Return the per-key singleflight lock (create if absent).
+
+        Callers must keep the returned lock referenced for as long as they use
+        it (e.g. a local around ``async with``); once nobody does, it is dropped.
+        """
         lock = self._locks.get(key)
         if lock is None:
             lock = self._locks[key] = asyncio.Lock()
@@ -0,0 +1,51 @@
+"""RFC 7807 problem+json encoding.
+
+The one place error bodies are built, shared by the FastAPI exception handlers
+in `main` and the pure-ASGI middlewares (which run outside FastAPI and so can't
+go through a `Response` class).
+"""
+
+from typing import Dict
+
+import orjson
+
+PROBLEM_MEDIA_TYPE = "application/problem+json"
+
+STATUS_TITLES: Dict[int, str] = {
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    422: "Unprocessable Entity",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def problem_body(
+    status: int,
+    title: str | None = None,
+    detail: str | None = None,
+    instance: str | None = None,
+) -> bytes:
+    """Encode an RFC 7807 problem document with orjson.
+
+    Args:
+        status: HTTP status code.
+        title: Short summary; defaults to the standard reason phrase for `status`.
+        detail: Human-readable explanation specific to this occurrence.
+        instance: URI reference (typically the request path) of the occurrence.
+
+    Returns:
+        The serialized JSON body.
+    """
+    return orjson.dumps(
+        {
+            "type": "about:blank",
+            "title": title or STATUS_TITLES.get(status, "Error"),
+            "status": status,
+            "detail": detail,
+            "instance": instance,
+        }
+    )
@@ -0,0 +1,132 @@
+"""In-process token-bucket rate limiting.
+
+A tiny pure-ASGI middleware keyed by client address. It is per pod and per
+worker (no shared storage), which matches how the app is deployed: the NGINX
+ingress does the cluster-wide limiting and this guards a single replica from
+bursts. Disabled unless `RATE_LIMIT_RPS` is set to a positive value.
+
+Buckets are keyed by `scope["client"]`. Behind the ingress that is the ingress
+pod's address, so every user shares one bucket, unless uvicorn is told to trust
+the ingress's `X-Forwarded-For` (`FORWARDED_ALLOW_IPS` set to the ingress
+addresses); its proxy-headers handling then puts the real client address there.
+"""
+
+import logging
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List
+
+from .problem import PROBLEM_MEDIA_TYPE, problem_body
+
+log = logging.getLogger(__name__)
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "0"))  # tokens/sec; 0 disables
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))  # bucket capacity
+
+# Sweep idle buckets once the table grows past this many client keys
+_MAX_BUCKETS = 10_000
+# Probe/scrape endpoints: kubelet and Prometheus hit these constantly and cheaply
+EXEMPT_PATHS: FrozenSet[str] = frozenset({"/", "/healthz", "/metrics"})
+
+_CONTENT_TYPE = PROBLEM_MEDIA_TYPE.encode()
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class TokenBucketMiddleware:
+    """Reject requests with 429 once a client's token bucket is empty.
+
+    Each client key holds `[tokens, last_refill]`. On every request the bucket
+    is refilled by `(now - last_refill) * rate` (capped at `burst`) and one
+    token is taken. No locking is needed: the event loop is single-threaded and
+    the check never awaits.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate: float,
+        burst: float,
+        exempt: FrozenSet[str] = EXEMPT_PATHS,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+            rate: Refill rate in tokens (requests) per second.
+            burst: Bucket capacity, i.e. the largest allowed burst.
+            exempt: Exact paths passed straight through without taking a token.
+        """
+        self.app = app
+        self.rate = rate
+        self.burst = burst
+        self.exempt = exempt
+        self._buckets: Dict[str, List[float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def _take(self, key: str) -> float:
+        """Take one token for `key`.
+
+        Returns:
+            0.0 if the request is allowed, otherwise seconds until a token is available.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # New clients start full; one clock read serves both init and refill
+            bucket = self._buckets[key] = [self.burst, now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return (1.0 - tokens) / self.rate
+        bucket[0] = tokens - 1.0
+        if len(self._buckets) > _MAX_BUCKETS:
+            self._sweep(now)
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets idle long enough to have refilled completely.
+
+        Runs at most once per refill period (`burst / rate`): nothing can have
+        gone idle sooner, so a flood of distinct, still-active clients doesn't
+        turn every allowed request into a full-table scan.
+        """
+        idle = self.burst / self.rate
+        if now - self._last_sweep <= idle:
+            return
+        self._last_sweep = now
+        for key in [k for k, (_, last) in self._buckets.items() if now - last > idle]:
+            del self._buckets[key]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        wait = self._take(client[0] if client else "unknown")
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        log.debug("ratelimit.reject path=%s wait=%.3fs", scope.get("path"), wait)
+        body = problem_body(
+            429, detail="Rate limit exceeded", instance=scope.get("path")
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", _CONTENT_TYPE),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(wait)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
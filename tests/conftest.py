@@ -7,6 +7,7 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 # --------------------------------------
 
+import asyncio
 import pytest_asyncio
 import json
 import pathlib
@@ -14,14 +15,14 @@ import httpx
 
 from contextlib import asynccontextmanager
 
-
 # Force an in-memory SQLite for unit tests so we never touch Postgres pooling.
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
 # Ensure no leftover pool envs confuse SQLAlchemy in tests
 os.environ.pop("DB_POOL_SIZE", None)
 os.environ.pop("DB_MAX_OVERFLOW", None)
 
-from app import db  # noqa: E402
+from app import api, db, http, ingest  # noqa: E402
+from app.page_cache import page_cache  # noqa: E402
 
 # Make sure the already-imported module uses our test URL
 db.configure_engine(os.environ["DATABASE_URL"])
@@ -35,6 +36,16 @@ def load_fixture(name: str) -> dict:
     return json.loads((FIXTURES / name).read_text())
 
 
+async def override_get_session():
+    """Yield a session from whichever engine the current test configured.
+
+    Defined once: `db.SessionLocal` is looked up at call time, so the same
+    override serves every test's fresh in-memory engine.
+    """
+    async with db.SessionLocal() as session:
+        yield session
+
+
 @pytest_asyncio.fixture(autouse=True)
 async def memory_db_and_overrides(monkeypatch):
     """
@@ -43,15 +54,25 @@ async def memory_db_and_overrides(monkeypatch):
     - Make FastAPI dependencies pull sessions from this engine.
     - Replace app lifespan so TestClient startup doesn't run ingest.
     """
+    # Fresh in-process refresh lock: asyncio locks bind to the loop they first wait on
+    ingest._refresh_lock = asyncio.Lock()
+    # Forget the last upstream digest/refresh so refreshes in each test do real work
+    ingest._last_digest = None
+    ingest._last_refresh_ts = None
+    # No cached upstream data or probe result, and no single-flight left over
+    api._snapshot = None
+    api._inflight = None
+    api._probe = None
+    api._probe_inflight = None
+    # Start every test with no cached pages or cached total count
+    page_cache.invalidate_all()
+
     # Point SQLAlchemy at an in-memory DB and create tables
     db.configure_engine("sqlite+aiosqlite:///:memory:")
+    engine = db.engine  # tests may monkeypatch db.engine; dispose the real one
     await db.init_db()
 
     # Dependency override: ensure request handlers use this in-memory session
-    async def override_get_session():
-        async with db.SessionLocal() as session:
-            yield session
-
     app_main.app.dependency_overrides[app_main.get_session] = override_get_session
 
     # Lifespan override: init schema, skip ingest
@@ -71,6 +92,16 @@ async def memory_db_and_overrides(monkeypatch):
     # Cleanup dependency override
     app_main.app.dependency_overrides.pop(app_main.get_session, None)
 
+    # Release this test's engine (and its aiosqlite worker thread) right away
+    await engine.dispose()
+
+    # Close the shared upstream client (if a test opened one) so its pool doesn't
+    # leak and per-test AsyncClient patches take effect on the next get_client()
+    await http.close_client()
+
+    # Re-read engine env next time; tests may have monkeypatched DB_* vars
+    db._pool_cfg.cache_clear()
+
 
 @pytest_asyncio.fixture
 async def test_app():
@@ -28,6 +28,9 @@ async def test_fetch_all_characters_exhausts_retries_and_raises(monkeypatch):
         async def __aexit__(self, *a):
             return False
 
+        async def aclose(self):
+            return None
+
         async def get(self, *a, **k):  # always returns a 500 response
             return FakeResp()
 
@@ -55,7 +58,10 @@ async def test_quick_upstream_probe_true_branch(monkeypatch):
         async def __aexit__(self, *a):
             return False
 
-        async def get(self, url):
+        async def aclose(self):
+            return None
+
+        async def get(self, url, **kwargs):
             return FakeResp()
 
     monkeypatch.setattr(api.httpx, "AsyncClient", lambda *a, **k: FakeClient())
@@ -148,3 +154,31 @@ def test_parse_retry_after_exception_branch(monkeypatch):
     # Force parsedate_to_datetime to raise so we hit the except-block and return None
     monkeypatch.setattr(api, "parsedate_to_datetime", _raise)
     assert api._parse_retry_after("Mon, 01 Jan 2099 00:00:00 GMT") is None
+
+
+def test_parse_retry_after_integer_fast_path_tolerates_whitespace(monkeypatch):
+    """_parse_retry_after(): padded delta-seconds never reach the HTTP-date parser."""
+    from app import api
+
+    def _unexpected(_):
+        raise AssertionError("HTTP-date parser should not be called")
+
+    monkeypatch.setattr(api, "parsedate_to_datetime", _unexpected)
+    assert api._parse_retry_after(" 7 ") == 7.0
+
+
+def test_next_backoff_is_decorrelated_and_capped(monkeypatch):
+    """_next_backoff(): draws from U(base, prev*3) and never exceeds the cap."""
+    from app import api
+
+    seen = []
+
+    def fake_uniform(lo, hi):
+        seen.append((lo, hi))
+        return hi
+
+    monkeypatch.setattr(api.random, "uniform", fake_uniform)
+    assert api._next_backoff(0.5) == 1.5
+    assert api._next_backoff(2.0) == 6.0
+    assert api._next_backoff(6.0) == api.BACKOFF_CAP
+    assert seen[0] == (api.BACKOFF_BASE, 1.5)
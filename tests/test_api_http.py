@@ -2,13 +2,18 @@
 
 Exercises:
 * 429/5xx retry/backoff logic
-* Pagination across multiple pages
+* Pagination across multiple pages (a failing page cancels the rest)
 * Transient transport error -> retry then success
 * quick_upstream_probe false path on exception
 * cache_info() empty state
 """
 
+import asyncio
+import json
+
 import pytest
+from fastapi import HTTPException
+
 from app import api
 
 
@@ -22,8 +27,9 @@ async def test_fetch_all_characters_retries_then_succeeds(monkeypatch):
             self._payload = payload or {}
             self.headers = headers or {}
 
-        def json(self):
-            return self._payload
+        @property
+        def content(self):
+            return json.dumps(self._payload).encode()
 
         def raise_for_status(self):
             if self.status_code >= 400:
@@ -34,14 +40,14 @@ async def test_fetch_all_characters_retries_then_succeeds(monkeypatch):
         200,
         {
             "results": [{"id": 1, "name": "A"}],
-            "info": {"next": "yes"},
+            "info": {"pages": 2, "next": "yes"},
         },
     )
     page2_ok = FakeResp(
         200,
         {
             "results": [{"id": 2, "name": "B"}],
-            "info": {"next": None},
+            "info": {"pages": 2, "next": None},
         },
     )
 
@@ -61,6 +67,9 @@ async def test_fetch_all_characters_retries_then_succeeds(monkeypatch):
         async def __aexit__(self, *a):
             return False
 
+        async def aclose(self):
+            return None
+
         async def get(self, url, params=None, timeout=None):
             i = idx["i"]
             idx["i"] += 1
@@ -87,8 +96,9 @@ async def test_fetch_all_characters_transport_error_then_success(monkeypatch):
             self._payload = payload
             self.headers = {}
 
-        def json(self):
-            return self._payload
+        @property
+        def content(self):
+            return json.dumps(self._payload).encode()
 
         def raise_for_status(self):
             return None
@@ -104,6 +114,9 @@ async def test_fetch_all_characters_transport_error_then_success(monkeypatch):
         async def __aexit__(self, *a):
             return False
 
+        async def aclose(self):
+            return None
+
         async def get(self, url, params=None, timeout=None):
             i = idx["i"]
             idx["i"] += 1
@@ -129,7 +142,10 @@ async def test_quick_upstream_probe_returns_false_on_exception(monkeypatch):
         async def __aexit__(self, *a):
             return False
 
-        async def get(self, url):  # simulate exception during GET
+        async def aclose(self):
+            return None
+
+        async def get(self, url, **kwargs):  # simulate exception during GET
             raise api.httpx.ConnectTimeout("timeout")
 
     monkeypatch.setattr(api.httpx, "AsyncClient", lambda *a, **k: FakeClient())
@@ -139,7 +155,70 @@ async def test_quick_upstream_probe_returns_false_on_exception(monkeypatch):
 
 def test_cache_info_empty():
     """Report populated=False, age=None when cache is empty."""
-    api._cache["ts"] = 0
-    api._cache["data"] = None
+    api._snapshot = None
     populated, age = api.cache_info()
     assert populated is False and age is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_characters_gathers_remaining_pages_in_order(monkeypatch):
+    """Fetch page 1, then pages 2..N concurrently (server-side filtered); keep page order."""
+
+    class FakeResp:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, payload):
+            self._payload = payload
+
+        @property
+        def content(self):
+            return json.dumps(self._payload).encode()
+
+        def raise_for_status(self):
+            return None
+
+    requested = []
+
+    class FakeClient:
+        async def get(self, url, params=None, timeout=None):
+            page = params["page"]
+            assert params["species"] == "Human" and params["status"] == "Alive"
+            requested.append(page)
+            # Later pages answer first to prove ordering doesn't depend on timing
+            await api.asyncio.sleep(0.01 * (4 - page))
+            return FakeResp({"results": [{"id": page}], "info": {"pages": 3}})
+
+    results = await api.fetch_all_characters(client=FakeClient())
+    assert requested[0] == 1
+    assert sorted(requested) == [1, 2, 3]
+    assert [r["id"] for r in results] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_characters_failing_page_cancels_the_rest(monkeypatch):
+    """A page that exhausts its retries cancels sibling fetches and raises its own error."""
+    cancelled = []
+
+    class FakeResp:
+        def __init__(self, payload):
+            self.content = json.dumps(payload).encode()
+
+    async def fake_request(client, url, params):
+        page = params["page"]
+        if page == 1:
+            return FakeResp({"results": [{"id": 1}], "info": {"pages": 3}})
+        if page == 2:
+            raise HTTPException(status_code=503, detail="down")
+        try:
+            await asyncio.sleep(10)  # still retrying/backing off
+        except asyncio.CancelledError:
+            cancelled.append(page)
+            raise
+
+    monkeypatch.setattr(api, "_request_with_retry", fake_request)
+
+    with pytest.raises(HTTPException) as ei:
+        await api.fetch_all_characters(client=object())
+    assert ei.value.status_code == 503
+    assert cancelled == [3]
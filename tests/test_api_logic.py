@@ -4,18 +4,23 @@ Covers:
 * Filtering rules (Human, Alive, origin startswith Earth)
 * Cache behavior for get_characters (hit/miss/expiry)
 * quick_upstream_probe happy path via a local httpx stub
+* cached_upstream_probe TTL reuse and coalescing of concurrent probes
 """
 
 import asyncio
-from typing import List, Dict, Any
+from typing import Any, Dict, Tuple
 
 import pytest
 from app import api
 
 
-def _sample_raw() -> List[Dict[str, Any]]:
-    """Mixed sample of upstream characters; only IDs 1 and 4 should pass filters."""
-    return [
+@pytest.fixture(scope="module")
+def sample_raw() -> Tuple[Dict[str, Any], ...]:
+    """Mixed sample of upstream characters; only IDs 1 and 4 should pass filters.
+
+    Built once per module and shared read-only: filtering never mutates its input.
+    """
+    return (
         {  # passes (Human, Alive, Earth*)
             "id": 1,
             "name": "Beth Smith",
@@ -61,13 +66,12 @@ def _sample_raw() -> List[Dict[str, Any]]:
             "image": "img5",
             "url": "u5",
         },
-    ]
+    )
 
 
-def test_filter_character_results_filters_and_shapes():
+def test_filter_character_results_filters_and_shapes(sample_raw):
     """Filter to Human+Alive+Earth and return a slimmed dict shape."""
-    raw = _sample_raw()
-    filtered = api.filter_character_results(raw)
+    filtered = api.filter_character_results(sample_raw)
 
     # Only two should pass
     assert len(filtered) == 2
@@ -89,7 +93,7 @@ def test_filter_character_results_filters_and_shapes():
 
 
 @pytest.mark.asyncio
-async def test_get_characters_uses_cache(monkeypatch):
+async def test_get_characters_uses_cache(monkeypatch, sample_raw):
     """Populate cache on first call; second call returns cached value."""
     # Make cache effectively long for this test
     monkeypatch.setattr(api, "CACHE_TTL", 60, raising=False)
@@ -98,11 +102,10 @@ async def test_get_characters_uses_cache(monkeypatch):
 
     async def fake_fetch_all():
         calls["n"] += 1
-        return _sample_raw()
+        return list(sample_raw)
 
     # Clear cache before test
-    api._cache["ts"] = 0
-    api._cache["data"] = None
+    api._snapshot = None
 
     monkeypatch.setattr(api, "fetch_all_characters", fake_fetch_all)
 
@@ -117,33 +120,130 @@ async def test_get_characters_uses_cache(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_get_characters_cache_expires(monkeypatch):
+async def test_get_characters_cache_expires(monkeypatch, sample_raw):
     """Cache expires after TTL; a subsequent call refetches from upstream."""
-    # Very short TTL so it expires
-    monkeypatch.setattr(api, "CACHE_TTL", 0.1, raising=False)
+    monkeypatch.setattr(api, "CACHE_TTL", 10, raising=False)
 
     calls = {"n": 0}
 
     async def fake_fetch_all():
         calls["n"] += 1
-        return _sample_raw()
+        return list(sample_raw)
 
     # Reset cache
-    api._cache["ts"] = 0
-    api._cache["data"] = None
+    api._snapshot = None
 
     monkeypatch.setattr(api, "fetch_all_characters", fake_fetch_all)
 
     _ = await api.get_characters()
     assert calls["n"] == 1
 
-    # Wait for TTL to expire
-    await asyncio.sleep(0.12)
+    # Backdate the snapshot past the TTL instead of sleeping it out
+    ts, data = api._snapshot
+    api._snapshot = (ts - 11.0, data)
 
     _ = await api.get_characters()
     assert calls["n"] == 2
 
 
+@pytest.mark.asyncio
+async def test_get_characters_coalesces_concurrent_misses(monkeypatch, sample_raw):
+    """Concurrent cold-cache callers share one upstream fetch (single-flight)."""
+    monkeypatch.setattr(api, "CACHE_TTL", 60, raising=False)
+
+    calls = {"n": 0}
+
+    async def fake_fetch_all():
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return list(sample_raw)
+
+    api._snapshot = None
+    monkeypatch.setattr(api, "fetch_all_characters", fake_fetch_all)
+
+    results = await asyncio.gather(*(api.get_characters() for _ in range(5)))
+
+    assert calls["n"] == 1
+    assert all(r == results[0] for r in results)
+    assert api._inflight is None
+
+
+@pytest.mark.asyncio
+async def test_get_characters_single_flight_propagates_errors(monkeypatch):
+    """A failed shared fetch raises for every waiter and clears the in-flight slot."""
+
+    async def failing_fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    api._snapshot = None
+    monkeypatch.setattr(api, "fetch_all_characters", failing_fetch)
+
+    results = await asyncio.gather(
+        *(api.get_characters() for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert api._inflight is None
+
+
+@pytest.mark.asyncio
+async def test_get_characters_ignores_finished_inflight_task(monkeypatch, sample_raw):
+    """A finished reload still parked in the slot is never re-served to new misses."""
+
+    async def failed():
+        raise RuntimeError("old failure")
+
+    old = asyncio.ensure_future(failed())
+    with pytest.raises(RuntimeError):
+        await old
+
+    async def fake_fetch_all():
+        return list(sample_raw)
+
+    api._snapshot = None
+    monkeypatch.setattr(api, "fetch_all_characters", fake_fetch_all)
+    monkeypatch.setattr(api, "_inflight", old)
+
+    assert len(await api.get_characters()) == 2
+    await asyncio.sleep(0)  # let the clear-callback run
+    assert api._inflight is None
+
+    # A late callback from the old task must not clear a newer reload's slot
+    newer = asyncio.ensure_future(asyncio.sleep(0))
+    api._inflight = newer
+    api._clear_inflight(old)
+    assert api._inflight is newer
+    await newer
+    api._inflight = None
+
+
+@pytest.mark.asyncio
+async def test_get_characters_serves_stale_while_revalidating(monkeypatch, sample_raw):
+    """Past the soft TTL, return cached data immediately and reload in the background."""
+    monkeypatch.setattr(api, "CACHE_TTL", 10, raising=False)
+
+    calls = {"n": 0}
+
+    async def fake_fetch_all():
+        calls["n"] += 1
+        return list(sample_raw)
+
+    monkeypatch.setattr(api, "fetch_all_characters", fake_fetch_all)
+    stale = [{"id": 999}]
+    api._snapshot = (api.time.monotonic() - 9.0, stale)  # 90% of TTL: soft-expired
+
+    got = await api.get_characters()
+    assert got is stale  # served without waiting on upstream
+    assert api._inflight is not None
+
+    await api._inflight
+    assert calls["n"] == 1
+    fresh = await api.get_characters()
+    assert [c["id"] for c in fresh] == [1, 4]
+    assert calls["n"] == 1
+
+
 @pytest.mark.asyncio
 async def test_quick_upstream_probe_mocked(monkeypatch):
     """Return True when the local httpx stub returns HTTP 200."""
@@ -162,9 +262,104 @@ async def test_quick_upstream_probe_mocked(monkeypatch):
         async def __aexit__(self, exc_type, exc, tb):
             return False
 
-        async def get(self, url):
+        async def aclose(self):
+            return None
+
+        async def get(self, url, **kwargs):
             return FakeResp()
 
     monkeypatch.setattr(api.httpx, "AsyncClient", FakeClient)
     ok = await api.quick_upstream_probe()
     assert ok is True
+
+
+@pytest.mark.asyncio
+async def test_cached_upstream_probe_coalesces_and_reuses(monkeypatch):
+    """Concurrent callers share one live probe; later callers reuse it within the TTL."""
+    calls = {"n": 0}
+    gate = asyncio.Event()
+
+    async def slow_probe():
+        calls["n"] += 1
+        await gate.wait()
+        return True
+
+    monkeypatch.setattr(api, "quick_upstream_probe", slow_probe)
+    monkeypatch.setattr(api, "PROBE_CACHE_TTL", 60.0)
+
+    waiters = [asyncio.create_task(api.cached_upstream_probe()) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    assert await asyncio.gather(*waiters) == [True] * 5
+    assert await api.cached_upstream_probe() is True
+    assert calls["n"] == 1
+
+    # Past the TTL the next caller probes again
+    monkeypatch.setattr(api, "PROBE_CACHE_TTL", 0.0)
+    assert await api.cached_upstream_probe() is True
+    assert calls["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_upstream_probe_ignores_finished_inflight_task(monkeypatch):
+    """A finished probe parked in the slot does not pin its result past the TTL."""
+
+    async def stale():
+        return False
+
+    old = asyncio.ensure_future(stale())
+    await old
+
+    async def live_probe():
+        return True
+
+    monkeypatch.setattr(api, "quick_upstream_probe", live_probe)
+    monkeypatch.setattr(api, "_probe_inflight", old)
+    monkeypatch.setattr(api, "PROBE_CACHE_TTL", 0.0)
+
+    assert await api.cached_upstream_probe() is True
+    await asyncio.sleep(0)  # let the clear-callback run
+    assert api._probe_inflight is None
+
+
+@pytest.mark.skipif(
+    not hasattr(asyncio, "eager_task_factory"), reason="needs Python 3.12+"
+)
+@pytest.mark.asyncio
+async def test_single_flight_slots_clear_under_eager_task_factory(
+    monkeypatch, sample_raw
+):
+    """Reloads/probes that finish without suspending don't pin their slot (lifespan's factory)."""
+    calls = {"fetch": 0, "probe": 0}
+
+    async def instant_fetch():
+        calls["fetch"] += 1
+        return list(sample_raw)
+
+    async def instant_probe():
+        calls["probe"] += 1
+        return calls["probe"] > 1
+
+    monkeypatch.setattr(api, "fetch_all_characters", instant_fetch)
+    monkeypatch.setattr(api, "quick_upstream_probe", instant_probe)
+    monkeypatch.setattr(api, "CACHE_TTL", 10)
+    monkeypatch.setattr(api, "PROBE_CACHE_TTL", 0.0)
+    api._snapshot = None
+
+    loop = asyncio.get_running_loop()
+    prev = loop.get_task_factory()
+    loop.set_task_factory(asyncio.eager_task_factory)
+    try:
+        await api.get_characters()
+        ts, data = api._snapshot
+        api._snapshot = (ts - 11.0, data)  # hard-expired
+        await api.get_characters()
+        assert calls["fetch"] == 2
+
+        assert await api.cached_upstream_probe() is False
+        assert await api.cached_upstream_probe() is True
+        assert calls["probe"] == 2
+    finally:
+        loop.set_task_factory(prev)
+    await asyncio.sleep(0)
+    assert api._inflight is None and api._probe_inflight is None
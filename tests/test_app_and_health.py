@@ -86,11 +86,12 @@ def test_healthcheck_ok(monkeypatch):
 
 
 def test_root_redirects_to_docs():
-    """GET / should 307-redirect to the docs URL."""
+    """GET / should 308-redirect (cacheably) to the docs URL."""
     client = TestClient(app_main.app)
 
     resp = client.get("/", follow_redirects=False)
-    assert resp.status_code == 307
+    assert resp.status_code == 308
+    assert resp.headers["cache-control"] == "public, max-age=86400"
 
     expected = app_main.app.docs_url or "/docs"
     assert resp.headers.get("location") == expected
@@ -112,6 +113,17 @@ def test_healthz_always_ok():
     assert resp.json() == {"status": "ok"}
 
 
+def test_request_metrics_recorded():
+    """The ASGI metrics middleware counts requests by route template/method/status."""
+    client = TestClient(app_main.app)
+    client.get("/healthz")
+    client.get("/no/such/path/123")
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",path="/healthz",status="200"}' in body
+    assert 'http_requests_total{method="GET",path="__other__",status="404"}' in body
+    assert "/no/such/path/123" not in body
+
+
 @pytest.mark.asyncio
 async def test_characters_500_on_db_programming_error(
     monkeypatch, test_app, test_client
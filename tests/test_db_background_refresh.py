@@ -7,6 +7,10 @@ import app.main as app_main
 from app import ingest
 
 
+async def _no_initial_sync(session):
+    return 0
+
+
 def test_background_refresher_runs_and_stops(monkeypatch):
     """Start real lifespan, shorten interval, and verify the loop fires at least once."""
     # Restore the real lifespan (conftest overrides it to skip background work)
@@ -25,6 +29,10 @@ def test_background_refresher_runs_and_stops(monkeypatch):
         return 0
 
     monkeypatch.setattr(ingest, "refresh_if_stale", fake_refresh)
+    # The worker only refreshes stale data; keep it stale on every tick, and keep
+    # the startup seed off the network so the test doesn't depend on upstream
+    monkeypatch.setattr(ingest, "is_stale", lambda: True)
+    monkeypatch.setattr(ingest, "initial_sync_if_empty", _no_initial_sync)
 
     with TestClient(app_main.app):
         # Give the background task a moment to run
@@ -37,7 +45,7 @@ def test_background_refresher_runs_and_stops(monkeypatch):
 def test_healthcheck_includes_last_refresh_age(monkeypatch):
     """Expose a numeric 'last_refresh_age' when a refresh has occurred."""
     # Set refresh time and capture exact time for comparison; pretend we refreshed 42s ago
-    set_time = time.time()
+    set_time = time.monotonic()
     age_seconds = 42
     ingest._last_refresh_ts = set_time - age_seconds
 
@@ -70,6 +78,10 @@ def test_background_refresher_exception_is_swallowed(monkeypatch):
         raise RuntimeError("boom")
 
     monkeypatch.setattr(ingest, "refresh_if_stale", boom)
+    # The worker only refreshes stale data; keep it stale on every tick, and keep
+    # the startup seed off the network so the test doesn't depend on upstream
+    monkeypatch.setattr(ingest, "is_stale", lambda: True)
+    monkeypatch.setattr(ingest, "initial_sync_if_empty", _no_initial_sync)
 
     # Start/stop the app; give the worker a moment to run (and raise)
     with TestClient(app_main.app):
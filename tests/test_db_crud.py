@@ -1,8 +1,9 @@
 """CRUD behavior tests.
 
 Covers:
-* Counting rows.
-* Portable per-row upsert via `session.merge()`.
+* Counting rows and the cheap emptiness check.
+* Bulk INSERT ... ON CONFLICT upsert (updates, in-batch duplicates, empty input,
+  batching).
 * SQL-level sorting and OFFSET/LIMIT pagination.
 """
 
@@ -17,6 +18,7 @@ async def test_upsert_and_count_and_list_paging_and_sort():
     await db.init_db()
     async with db.SessionLocal() as s:
         assert await crud.count_characters(s) == 0
+        assert await crud.characters_nonempty(s) is False
 
         items = [
             {
@@ -50,6 +52,7 @@ async def test_upsert_and_count_and_list_paging_and_sort():
         n = await crud.upsert_characters(s, items)
         assert n == 3
         assert await crud.count_characters(s) == 3
+        assert await crud.characters_nonempty(s) is True
 
         rows, total = await crud.list_characters(
             s, sort="id", order="asc", page=1, page_size=2
@@ -70,3 +73,64 @@ async def test_upsert_and_count_and_list_paging_and_sort():
             "Morty Smith",
             "Beth Smith",
         ]
+
+
+@pytest.mark.asyncio
+async def test_upsert_updates_existing_and_collapses_duplicates():
+    """Re-upserting an id updates it; duplicate ids in one batch keep the last."""
+    db.configure_engine("sqlite+aiosqlite:///:memory:")
+    await db.init_db()
+    base = {
+        "status": "Alive",
+        "species": "Human",
+        "origin": "Earth (C-137)",
+        "image": None,
+        "url": None,
+    }
+    async with db.SessionLocal() as s:
+        assert await crud.upsert_characters(s, []) == 0
+        assert await crud.upsert_characters(s, [{"id": 1, "name": "Rick", **base}]) == 1
+
+        n = await crud.upsert_characters(
+            s,
+            [
+                {"id": 1, "name": "Rick v2", **base},
+                {"id": 2, "name": "Morty", **base},
+                {"id": 2, "name": "Morty v2", **base},
+            ],
+        )
+        assert n == 2
+        rows, total = await crud.list_characters(
+            s, sort="id", order="asc", page=1, page_size=10
+        )
+        assert total == 2
+        assert [r["name"] for r in rows] == ["Rick v2", "Morty v2"]
+
+        rows, total = await crud.list_characters(
+            s, sort="id", order="desc", page=1, page_size=1, with_total=False
+        )
+        assert total is None
+        assert [r["id"] for r in rows] == [2]
+
+
+@pytest.mark.asyncio
+async def test_upsert_splits_large_input_into_batches(monkeypatch):
+    """Inputs larger than the batch size are written across several INSERTs."""
+    db.configure_engine("sqlite+aiosqlite:///:memory:")
+    await db.init_db()
+    monkeypatch.setattr(crud, "_UPSERT_BATCH", 2)
+    items = [
+        {
+            "id": i,
+            "name": f"Clone {i}",
+            "status": "Alive",
+            "species": "Human",
+            "origin": "Earth (C-137)",
+            "image": None,
+            "url": None,
+        }
+        for i in range(1, 6)
+    ]
+    async with db.SessionLocal() as s:
+        assert await crud.upsert_characters(s, items) == 5
+        assert await crud.count_characters(s) == 5
@@ -3,12 +3,16 @@
 Covers:
 * Initial seeding if the table is empty.
 * TTL-based refresh that no-ops when recently refreshed.
+* Refresh that skips filter/upsert when the upstream payload is unchanged.
 """
 
+import asyncio
 import logging
+import time
 import pytest
 
 from contextlib import asynccontextmanager
+from types import SimpleNamespace
 
 from app import db, ingest, crud, api
 
@@ -103,7 +107,7 @@ async def test_refresh_if_stale_behaves_with_ttl(monkeypatch):
     async with db.SessionLocal() as s:
         await crud.upsert_characters(s, _sample_filtered()[:1])
 
-        ingest._last_refresh_ts = 0
+        ingest._last_refresh_ts = None  # never refreshed -> stale
         monkeypatch.setattr(ingest, "REFRESH_TTL", 600, raising=False)
 
         n1 = await ingest.refresh_if_stale(s)
@@ -114,6 +118,54 @@ async def test_refresh_if_stale_behaves_with_ttl(monkeypatch):
         assert n2 == 0
 
 
+@pytest.mark.asyncio
+async def test_refresh_skips_upsert_when_upstream_unchanged(monkeypatch):
+    """An identical upstream payload bumps the refresh time without DB writes."""
+    db.configure_engine("sqlite+aiosqlite:///:memory:")
+    await db.init_db()
+
+    async def fake_fetch():
+        return _sample_raw()
+
+    calls = {"filter": 0, "upsert": 0}
+    real_upsert = crud.upsert_characters
+
+    def fake_filter(chars):
+        calls["filter"] += 1
+        return _sample_filtered()
+
+    async def spy_upsert(session, items):
+        calls["upsert"] += 1
+        return await real_upsert(session, items)
+
+    monkeypatch.setattr(api, "fetch_all_characters", fake_fetch)
+    monkeypatch.setattr(api, "filter_character_results", fake_filter)
+    monkeypatch.setattr(crud, "upsert_characters", spy_upsert)
+
+    async with db.SessionLocal() as s:
+        ingest._last_refresh_ts = None
+        assert await ingest.refresh_if_stale(s) == 2
+
+        ingest._last_refresh_ts = None  # stale again, same payload upstream
+        assert await ingest.refresh_if_stale(s) == 0
+        assert ingest._last_refresh_ts is not None
+
+    assert calls == {"filter": 1, "upsert": 1}
+
+
+def test_is_stale_tracks_refresh_ttl(monkeypatch):
+    """is_stale() is True before any refresh and once the TTL has elapsed."""
+    monkeypatch.setattr(ingest, "REFRESH_TTL", 600, raising=False)
+    ingest._last_refresh_ts = None
+    assert ingest.is_stale() is True
+
+    ingest._last_refresh_ts = time.monotonic()
+    assert ingest.is_stale() is False
+
+    ingest._last_refresh_ts = time.monotonic() - 601
+    assert ingest.is_stale() is True
+
+
 class FakeScalar:
     """Result wrapper that returns a specific scalar() value."""
 
@@ -125,7 +177,9 @@ class FakeScalar:
 
 
 class FakeSession:
-    """Minimal AsyncSession stub exposing execute()."""
+    """Minimal Postgres-bound AsyncSession stub exposing execute()."""
+
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
 
     def __init__(self, seq):
         """
@@ -155,7 +209,7 @@ async def test_initial_sync_no_lock_acquired_is_noop(monkeypatch):
         called["count"] += 1
         return 0
 
-    monkeypatch.setattr(crud, "count_characters", never_called)
+    monkeypatch.setattr(crud, "characters_nonempty", never_called)
 
     n = await ingest.initial_sync_if_empty(session)  # should return 0 early
     assert n == 0
@@ -168,10 +222,10 @@ async def test_initial_sync_lock_fn_raises_proceeds_unlocked(monkeypatch):
     session = FakeSession([RuntimeError("no pg fn")])  # triggers except path in lock CM
 
     # Make table empty so we take the ingest branch
-    async def count_zero(_):
-        return 0
+    async def table_empty(_):
+        return False
 
-    monkeypatch.setattr(crud, "count_characters", count_zero)
+    monkeypatch.setattr(crud, "characters_nonempty", table_empty)
 
     async def fake_fetch():
         return [
@@ -219,7 +273,7 @@ async def test_refresh_if_stale_lock_not_acquired_is_noop(monkeypatch):
     session = FakeSession([False])  # lock NOT acquired
 
     # Force "stale" so we attempt a refresh path
-    ingest._last_refresh_ts = 0
+    ingest._last_refresh_ts = None
     monkeypatch.setenv("REFRESH_TTL", "1", prepend=False)
 
     n = await ingest.refresh_if_stale(session)
@@ -264,7 +318,7 @@ async def test_refresh_if_stale_success_path(monkeypatch):
     monkeypatch.setattr(api, "filter_character_results", fake_filter)
     monkeypatch.setattr(crud, "upsert_characters", upsert_one)
 
-    ingest._last_refresh_ts = 0  # force stale
+    ingest._last_refresh_ts = None  # force stale
     n = await ingest.refresh_if_stale(session)
     assert n == 1
     # age should be small (recently set); just ensure it's numeric
@@ -272,12 +326,8 @@ async def test_refresh_if_stale_success_path(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_pg_advisory_lock_logs_release_when_supported(caplog, monkeypatch):
-    """
-    Force the advisory lock *and* unlock paths to 'succeed' so we hit the
-    '...released' log line in the finally-block.
-    """
-    # Fresh in-memory DB
+async def test_pg_advisory_lock_uses_xact_lock_without_unlock(monkeypatch):
+    """On Postgres, take a transaction-scoped lock and never issue pg_advisory_unlock."""
     db.configure_engine("sqlite+aiosqlite:///:memory:")
     await db.init_db()
 
@@ -285,24 +335,81 @@ async def test_pg_advisory_lock_logs_release_when_supported(caplog, monkeypatch)
         def scalar(self):
             return True  # reports lock acquired
 
-    async def fake_execute(_sql, _params=None):
-        # Pretend both pg_try_advisory_lock and pg_advisory_unlock succeed
-        return FakeResult()
+    statements = []
 
-    caplog.set_level(logging.DEBUG, logger="app.ingest")
+    async def fake_execute(sql, _params=None):
+        statements.append(str(sql))
+        return FakeResult()
 
     async with db.SessionLocal() as s:
-        # Patch session.execute so both lock and unlock "work"
+        # Pretend we're on Postgres and patch session.execute to record SQL
+        monkeypatch.setattr(ingest, "_is_postgres", lambda _s: True)
         monkeypatch.setattr(s, "execute", fake_execute)
 
         async with ingest._pg_advisory_lock(s, 0xBEEF) as have:
             assert have is True
 
-    # Should see the 'released' message (covers line ~53)
-    assert any(
-        "advisory_lock key=" in rec.message and "released" in rec.message
-        for rec in caplog.records
-    )
+    assert statements == ["SELECT pg_try_advisory_xact_lock(:k)"]
+
+
+@pytest.mark.asyncio
+async def test_pg_advisory_lock_rolls_back_uncommitted_transaction(caplog, monkeypatch):
+    """Exiting without a commit rolls back, which releases the xact lock."""
+    db.configure_engine("sqlite+aiosqlite:///:memory:")
+    await db.init_db()
+    caplog.set_level(logging.DEBUG, logger="app.ingest")
+    monkeypatch.setattr(ingest, "_is_postgres", lambda _s: True)
+
+    async with db.SessionLocal() as s:
+        # On SQLite the pg_* call fails but still autobegins the transaction
+        async with ingest._pg_advisory_lock(s, 0xBEEF) as have:
+            assert have is True
+            assert s.in_transaction()
+        assert not s.in_transaction()
+
+    assert any("released via rollback" in rec.message for rec in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_fetch_once(monkeypatch):
+    """Two concurrent stale refreshes on one pod: the second sees fresh data and skips."""
+    calls = {"n": 0}
+
+    async def slow_fetch():
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return _sample_raw()
+
+    async def upsert_all(_s, rows):
+        return len(rows)
+
+    monkeypatch.setattr(api, "fetch_all_characters", slow_fetch)
+    monkeypatch.setattr(api, "filter_character_results", lambda _c: _sample_filtered())
+    monkeypatch.setattr(crud, "upsert_characters", upsert_all)
+    monkeypatch.setattr(ingest, "REFRESH_TTL", 600, raising=False)
+    ingest._last_refresh_ts = None
+
+    async with db.SessionLocal() as s1, db.SessionLocal() as s2:
+        results = await asyncio.gather(
+            ingest.refresh_if_stale(s1), ingest.refresh_if_stale(s2)
+        )
+
+    assert calls["n"] == 1
+    assert sorted(results) == [0, len(_sample_filtered())]
+
+
+@pytest.mark.asyncio
+async def test_pg_advisory_lock_issues_no_sql_on_non_postgres():
+    """On a non-Postgres session the lock yields True without calling execute()."""
+
+    class SqliteSession:
+        bind = SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+
+        async def execute(self, *_a, **_k):
+            raise AssertionError("no SQL expected on non-Postgres engines")
+
+    async with ingest._pg_advisory_lock(SqliteSession(), 0xBEEF) as have:
+        assert have is True
 
 
 @pytest.mark.asyncio
@@ -20,6 +20,12 @@ from app.main import app
 from app import db, ingest, api
 from app.db import get_session
 
+# These hit the live Rick & Morty API; opt in so offline runs don't fail on DNS
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_INTEGRATION"),
+    reason="hits the live upstream API; set RUN_INTEGRATION=1 to run",
+)
+
 
 @pytest_asyncio.fixture
 async def sqlite_db():
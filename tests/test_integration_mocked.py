@@ -30,12 +30,12 @@ from httpx import Response
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine
 
+import app.main as app_main
 from app.main import app
 from app import db, ingest, api, crud
 from app.db import get_session
 from app.page_cache import page_cache
 
-
 # =========================
 # Expected sets from fixtures
 # =========================
@@ -395,29 +395,35 @@ async def test_background_refresh_updates_age(
     test_client,
     respx_mocked,
     rickmorty_page1,
+    monkeypatch,
 ):
     """Verify background refresh worker updates freshness in /healthcheck.
 
-    The REFRESH_WORKER runs on a short interval and fetches from the mocked
-    upstream; we assert the reported `last_refresh_age` changes across a cycle.
+    Runs the real application lifespan (conftest swaps in a no-op one) so the
+    REFRESH_WORKER actually ticks every second against the mocked upstream;
+    with a zero TTL each tick refreshes, so `last_refresh_age` stays below the
+    time slept instead of growing with it.
 
     Args:
         test_app: Configured FastAPI application.
         test_client: Test client bound to the app.
         respx_mocked: respx router for mocking upstream.
         rickmorty_page1: JSON for a single page response.
+        monkeypatch: Pytest fixture for env/attribute patching.
     """
-    os.environ["REFRESH_INTERVAL"] = "1"
-    os.environ["REFRESH_WORKER_ENABLED"] = "1"
+    monkeypatch.setenv("REFRESH_INTERVAL", "1")
+    monkeypatch.setenv("REFRESH_WORKER_ENABLED", "1")
+    monkeypatch.setattr(ingest, "REFRESH_TTL", 0)
 
     respx_mocked.get(api.BASE_URL).mock(
         return_value=Response(200, json=rickmorty_page1)
     )
 
-    async with test_app.router.lifespan_context(test_app):
+    async with app_main.lifespan(test_app):
         r1 = test_client.get("/healthcheck")
         assert r1.status_code == 200
         first = r1.json()["last_refresh_age"]
+        assert first is not None  # the initial sync counts as a refresh
 
         await asyncio.sleep(2)
 
@@ -425,8 +431,8 @@ async def test_background_refresh_updates_age(
         assert r2.status_code == 200
         second = r2.json()["last_refresh_age"]
 
-        # If never refreshed, values might be equal/None; we expect change
-        assert first != second
+        # Without a refresh during the sleep the age would be >= 2s
+        assert second is not None and second < 2
 
 
 @pytest.mark.asyncio
@@ -648,7 +654,9 @@ async def test_healthcheck_stale_but_serving(test_app, test_client, monkeypatch)
     # Small TTL so we can mark stale easily
     monkeypatch.setenv("REFRESH_TTL", "1")
     # Force "last refresh" to long ago
-    monkeypatch.setattr(ingest, "_last_refresh_ts", time.time() - 10, raising=False)
+    monkeypatch.setattr(
+        ingest, "_last_refresh_ts", time.monotonic() - 10, raising=False
+    )
 
     async def _probe_false():
         return False
@@ -747,9 +755,9 @@ async def test_page_cache_hit_avoids_db_call(test_app, test_client, monkeypatch)
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _spy(session, sort, order, page, page_size):
+    async def _spy(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _spy)
 
@@ -779,18 +787,16 @@ async def test_page_cache_ttl_expiry_triggers_refetch(
     monkeypatch.setattr(page_cache, "_ttl", 1.0, raising=False)
 
     # Controlled clock for page_cache
-    import app.page_cache as mod
-
     now = {"t": 1000.0}
-    monkeypatch.setattr(mod.time, "time", lambda: now["t"])
+    monkeypatch.setattr(page_cache, "_clock", lambda: now["t"], raising=False)
 
     # Spy on crud.list_characters
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _spy(session, sort, order, page, page_size):
+    async def _spy(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _spy)
 
@@ -858,9 +864,9 @@ async def test_page_cache_invalidation_on_refresh(test_app, test_client, monkeyp
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _spy(session, sort, order, page, page_size):
+    async def _spy(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _spy)
 
@@ -893,10 +899,10 @@ async def test_page_cache_singleflight_under_concurrency(test_app, monkeypatch):
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _slow(session, sort, order, page, page_size):
+    async def _slow(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
         await asyncio.sleep(0.05)
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _slow)
 
@@ -923,9 +929,9 @@ async def test_cache_keying_by_params_separates_entries(
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _spy(session, sort, order, page, page_size):
+    async def _spy(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _spy)
 
@@ -967,9 +973,9 @@ async def test_out_of_range_pages_are_cached_too(test_app, test_client, monkeypa
     orig = crud.list_characters
     calls = {"n": 0}
 
-    async def _spy(session, sort, order, page, page_size):
+    async def _spy(session, sort, order, page, page_size, **kw):
         calls["n"] += 1
-        return await orig(session, sort, order, page, page_size)
+        return await orig(session, sort, order, page, page_size, **kw)
 
     monkeypatch.setattr(crud, "list_characters", _spy)
 
@@ -1120,7 +1126,7 @@ async def test_concurrent_queries_during_refresh_overlap_deterministic_async(
 
     # Make data "stale" so a refresh will run
     monkeypatch.setattr(ingest, "REFRESH_TTL", 0, raising=False)
-    monkeypatch.setattr(ingest, "_last_refresh_ts", 0.0, raising=False)
+    monkeypatch.setattr(ingest, "_last_refresh_ts", None, raising=False)
 
     # Kick off a one-shot refresh in the background (no reliance on app's worker)
     async def _run_refresh_once():
@@ -2,6 +2,7 @@ import logging
 import pytest
 from app import main
 import asyncio as _asyncio
+from contextlib import asynccontextmanager
 
 
 @pytest.mark.asyncio
@@ -127,14 +128,15 @@ async def test_lifespan_refresh_worker_logs_cycle(monkeypatch, caplog):
 
     monkeypatch.setattr(main.ingest, "initial_sync_if_empty", sync_if_empty)
 
-    # Replace get_session with a 1-iteration async generator
-    async def fake_get_session():
+    # Replace the session factory with one yielding a dummy session
+    @asynccontextmanager
+    async def fake_session_local():
         class Dummy:
             pass
 
         yield Dummy()
 
-    monkeypatch.setattr(main, "get_session", fake_get_session)
+    monkeypatch.setattr(main.db, "SessionLocal", fake_session_local)
 
     # When the refresher runs, return a positive upsert count
     ran = _asyncio.Event()
@@ -144,6 +146,8 @@ async def test_lifespan_refresh_worker_logs_cycle(monkeypatch, caplog):
         return 5
 
     monkeypatch.setattr(main.ingest, "refresh_if_stale", fake_refresh)
+    # The worker only opens a session once data is stale
+    monkeypatch.setattr(main.ingest, "_last_refresh_ts", None)
 
     # Run lifespan; wait for one refresh cycle to happen, then exit.
     async with main.lifespan(main.app):
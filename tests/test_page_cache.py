@@ -7,26 +7,27 @@ import pytest
 
 from app.db import get_session
 from app import ingest, api, crud
-from app.page_cache import PageCache, PageKey
+from app.page_cache import PageCache
 
 import app.main as main
 
 
-def test_page_key_is_structured_and_hashable():
-    """Verify PageKey structure, equality, and hashability.
+def test_page_key_is_plain_hashable_tuple():
+    """Verify key() builds a plain (sort, order, page, page_size) tuple.
 
     Ensures:
-        * The tuple-like key preserves field types and order.
+        * Field order is preserved.
         * Keys can be used in dictionaries/sets without collisions.
     """
-    k1 = PageKey("id", "asc", 1, 20)
-    k2 = PageKey("id", "asc", 1, 20)
-    k3 = PageKey("name", "asc", 1, 20)
+    cache = PageCache(ttl=1, capacity=1)
+    k1 = cache.key("id", "asc", 1, 20)
+    k2 = cache.key("id", "asc", 1, 20)
+    k3 = cache.key("name", "asc", 1, 20)
 
+    assert type(k1) is tuple and k1 == ("id", "asc", 1, 20)
     d = {k1: "a"}
     assert d[k2] == "a"  # equality & hash
     assert k1 != k3
-    assert isinstance(k1.page, int) and isinstance(k1.page_size, int)
 
 
 def test_put_get_and_ttl_expiration(monkeypatch):
@@ -37,14 +38,10 @@ def test_put_get_and_ttl_expiration(monkeypatch):
         2) Within TTL, get() returns the value.
         3) After TTL, get() returns None and entry is evicted.
     """
-    from app import page_cache as mod
-
-    cache = PageCache(ttl=1.0, capacity=10)
-    key = cache.key("id", "asc", 1, 20)
-
     # Controlled clock
     now = {"t": 1_000.0}
-    monkeypatch.setattr(mod.time, "time", lambda: now["t"])
+    cache = PageCache(ttl=1.0, capacity=10, clock=lambda: now["t"])
+    key = cache.key("id", "asc", 1, 20)
 
     # Put and get (fresh)
     payload = {"ok": True}
@@ -63,21 +60,33 @@ def test_put_get_and_ttl_expiration(monkeypatch):
     assert cache.stats()["size"] == 0
 
 
+def test_total_count_ttl_and_invalidation():
+    """The shared total expires with the TTL and is cleared with the pages."""
+    now = {"t": 1_000.0}
+    cache = PageCache(ttl=1.0, capacity=10, clock=lambda: now["t"])
+    assert cache.get_total() is None
+
+    cache.put_total(42)
+    assert cache.get_total() == 42
+    now["t"] += 2.0
+    assert cache.get_total() is None
+
+    cache.put_total(7)
+    cache.invalidate_all()
+    assert cache.get_total() is None
+
+
 def test_lru_capacity_eviction_and_bump(monkeypatch):
     """LRU capacity: inserting beyond capacity evicts the least-recently-used entry.
 
     Also verifies that a get() bumps recency so a recently accessed key is retained.
     """
-    from app import page_cache as mod
-
-    cache = PageCache(ttl=60.0, capacity=2)
+    # Stable time
+    cache = PageCache(ttl=60.0, capacity=2, clock=lambda: 1000.0)
     k1 = cache.key("id", "asc", 1, 20)
     k2 = cache.key("id", "asc", 2, 20)
     k3 = cache.key("id", "asc", 3, 20)
 
-    # Stable time
-    monkeypatch.setattr(mod.time, "time", lambda: 1000.0)
-
     cache.put(k1, {"p": 1})
     cache.put(k2, {"p": 2})
 
@@ -96,6 +105,20 @@ def test_lru_capacity_eviction_and_bump(monkeypatch):
     assert cache.stats()["capacity"] == 2
 
 
+def test_unreferenced_locks_are_dropped():
+    """Locks nobody holds are garbage-collected instead of accumulating."""
+    import gc
+
+    cache = PageCache(ttl=10, capacity=10)
+    held = cache.lock_for(cache.key("id", "asc", 1, 20))
+    for page in range(2, 50):
+        cache.lock_for(cache.key("id", "asc", page, 20))
+    gc.collect()
+
+    assert len(cache._locks) == 1
+    assert cache.lock_for(cache.key("id", "asc", 1, 20)) is held
+
+
 def test_invalidate_all_clears_cache():
     """invalidate_all() removes all entries and resets size."""
     cache = PageCache(ttl=60.0, capacity=10)
@@ -310,7 +333,7 @@ async def test_characters_ignores_page_cache_failures_and_hits_db(
     monkeypatch.setattr(main.page_cache, "get", boom)
     monkeypatch.setattr(main.page_cache, "put", boom)
 
-    async def fake_list(_session, sort, order, page, page_size):
+    async def fake_list(_session, sort, order, page, page_size, **kw):
         return ([{"id": 1, "name": "Rick Sanchez"}], 1)
 
     monkeypatch.setattr(crud, "list_characters", fake_list)
@@ -328,3 +351,71 @@ async def test_characters_ignores_page_cache_failures_and_hits_db(
         'cache_errors_total{cache="page",op="get"}' in m.text
         or 'cache_errors_total{cache="page",op="put"}' in m.text
     )
+
+
+@pytest.mark.asyncio
+async def test_characters_caches_serialized_body(monkeypatch, test_app, test_client):
+    """The route stores encoded bytes and serves hits from them unchanged."""
+    main.page_cache.invalidate_all()
+    calls = {"n": 0}
+
+    async def fake_list(_session, sort, order, page, page_size, **kw):
+        calls["n"] += 1
+        return ([{"id": 1, "name": "Rick Sanchez"}], 1)
+
+    monkeypatch.setattr(crud, "list_characters", fake_list)
+
+    url = "/characters?sort=id&order=asc&page=1&page_size=10"
+    r1 = await test_client.get(url)
+    r2 = await test_client.get(url)
+
+    assert calls["n"] == 1
+    assert r1.content == r2.content
+    assert (r1.headers["x-cache"], r2.headers["x-cache"]) == ("MISS", "HIT")
+    body, etag = main.page_cache.get(main.page_cache.key("id", "asc", 1, 10))
+    assert isinstance(body, bytes) and body == r1.content
+    assert r1.headers["etag"] == r2.headers["etag"] == etag
+    main.page_cache.invalidate_all()
+
+
+@pytest.mark.asyncio
+async def test_characters_if_none_match_returns_304(monkeypatch, test_app, test_client):
+    """A matching If-None-Match gets an empty 304 on both miss and hit paths."""
+
+    async def fake_list(_session, sort, order, page, page_size, **kw):
+        return ([{"id": 1, "name": "Rick Sanchez"}], 1)
+
+    monkeypatch.setattr(crud, "list_characters", fake_list)
+
+    url = "/characters?page=1&page_size=10"
+    etag = (await test_client.get(url)).headers["etag"]
+
+    r = await test_client.get(url, headers={"If-None-Match": f'"x", W/{etag}'})
+    assert r.status_code == 304 and r.content == b""
+    assert r.headers["etag"] == etag
+
+    main.page_cache.invalidate_all()  # miss path compares against the new body
+    r = await test_client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    r = await test_client.get(url, headers={"If-None-Match": '"stale"'})
+    assert r.status_code == 200 and r.json()["total_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_characters_counts_once_across_pages(monkeypatch, test_app, test_client):
+    """Only the first page miss asks for COUNT(*); later misses reuse the total."""
+    seen = []
+
+    async def fake_list(_session, sort, order, page, page_size, with_total=True):
+        seen.append(with_total)
+        return ([{"id": page, "name": "Rick Sanchez"}], 25 if with_total else None)
+
+    monkeypatch.setattr(crud, "list_characters", fake_list)
+
+    r1 = await test_client.get("/characters?page=1&page_size=10")
+    r2 = await test_client.get("/characters?page=2&page_size=10")
+
+    assert seen == [True, False]
+    assert r1.json()["total_count"] == r2.json()["total_count"] == 25
+    assert r2.json()["total_pages"] == 3
@@ -17,7 +17,7 @@ def test_characters_pagination_first_page(monkeypatch):
     """Page 1 (10/page): first 10 IDs, has_next=True, has_prev=False."""
     data = _fake_list(50)
 
-    async def fake_list(session, sort, order, page, page_size):
+    async def fake_list(session, sort, order, page, page_size, **kw):
         rows = sorted(data, key=lambda x: x["id"])
         start = (page - 1) * page_size
         end = start + page_size
@@ -42,7 +42,7 @@ def test_characters_pagination_middle_page(monkeypatch):
     """Page 2 of 3 (10/page): IDs 11..20, has_prev/has_next both True."""
     data = _fake_list(25)
 
-    async def fake_list(session, sort, order, page, page_size):
+    async def fake_list(session, sort, order, page, page_size, **kw):
         rows = sorted(data, key=lambda x: x["id"])
         start = (page - 1) * page_size
         end = start + page_size
@@ -64,7 +64,7 @@ def test_characters_pagination_last_page(monkeypatch):
     """Last page: only the final row appears; has_next=False."""
     data = _fake_list(21)
 
-    async def fake_list(session, sort, order, page, page_size):
+    async def fake_list(session, sort, order, page, page_size, **kw):
         rows = sorted(data, key=lambda x: x["id"])
         start = (page - 1) * page_size
         end = start + page_size
@@ -86,7 +86,7 @@ def test_characters_pagination_beyond_last_returns_empty(monkeypatch):
     """Beyond last page: results are empty but pagination metadata is consistent."""
     data = _fake_list(15)
 
-    async def fake_list(session, sort, order, page, page_size):
+    async def fake_list(session, sort, order, page, page_size, **kw):
         rows = sorted(data, key=lambda x: x["id"])
         start = (page - 1) * page_size
         end = start + page_size
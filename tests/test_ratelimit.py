@@ -0,0 +1,128 @@
+"""Token-bucket rate limiter middleware tests.
+
+Covers:
+* Requests within the burst pass through to the wrapped app.
+* An empty bucket yields 429 problem+json with Retry-After.
+* Buckets refill over time and are tracked per client.
+* Probe endpoints bypass the limiter.
+* Idle-bucket sweeps are rate-limited to one per refill period.
+* Rejected requests are still counted by the metrics middleware.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from app import metrics, ratelimit
+from app.ratelimit import TokenBucketMiddleware
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _client(mw, ip="10.0.0.1"):
+    transport = httpx.ASGITransport(app=mw, client=(ip, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://testserver")
+
+
+@pytest.mark.asyncio
+async def test_burst_then_429_then_refill(monkeypatch):
+    """Allow `burst` requests, reject the next, and allow again after refill."""
+    now = {"t": 1000.0}
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now["t"])
+    mw = TokenBucketMiddleware(_ok_app, rate=1.0, burst=2)
+
+    async with _client(mw) as c:
+        assert (await c.get("/characters")).status_code == 200
+        assert (await c.get("/characters")).status_code == 200
+
+        r = await c.get("/characters")
+        assert r.status_code == 429
+        assert r.headers["content-type"] == "application/problem+json"
+        assert r.headers["retry-after"] == "1"
+        body = r.json()
+        assert body["status"] == 429 and body["instance"] == "/characters"
+
+        now["t"] += 1.0  # one token refilled
+        assert (await c.get("/characters")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_per_client(monkeypatch):
+    """One client's empty bucket does not throttle another client."""
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 1000.0)
+    mw = TokenBucketMiddleware(_ok_app, rate=1.0, burst=1)
+
+    async with _client(mw, "10.0.0.1") as a, _client(mw, "10.0.0.2") as b:
+        assert (await a.get("/characters")).status_code == 200
+        assert (await a.get("/characters")).status_code == 429
+        assert (await b.get("/characters")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_probe_paths_are_exempt(monkeypatch):
+    """/healthz never takes a token, even once the client's bucket is empty."""
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 1000.0)
+    mw = TokenBucketMiddleware(_ok_app, rate=1.0, burst=1)
+
+    async with _client(mw) as c:
+        assert (await c.get("/characters")).status_code == 200
+        assert (await c.get("/characters")).status_code == 429
+        for _ in range(3):
+            assert (await c.get("/healthz")).status_code == 200
+
+
+def test_sweep_runs_at_most_once_per_refill_period(monkeypatch):
+    """Over the bucket cap, idle buckets are swept, but not on every request."""
+    now = {"t": 1000.0}
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now["t"])
+    monkeypatch.setattr(ratelimit, "_MAX_BUCKETS", 2)
+    mw = TokenBucketMiddleware(_ok_app, rate=1.0, burst=2)  # refill period: 2s
+    scans = {"n": 0}
+    real_items = dict.items
+
+    class CountingDict(dict):
+        def items(self):
+            scans["n"] += 1
+            return real_items(self)
+
+    mw._buckets = CountingDict()
+
+    for ip in ("a", "b", "c", "d"):
+        assert mw._take(ip) == 0.0
+    assert scans["n"] == 0 and len(mw._buckets) == 4  # all active: no scan
+
+    now["t"] += 3.0  # a, b, c, d have all refilled
+    assert mw._take("e") == 0.0
+    assert scans["n"] == 1
+    assert set(mw._buckets) == {"e"}
+
+
+@pytest.mark.asyncio
+async def test_rejections_are_counted_by_metrics_middleware(monkeypatch):
+    """With main's ordering (limiter added before metrics), 429s reach http_requests_total."""
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 1000.0)
+    app = FastAPI()
+
+    @app.get("/limited")
+    async def limited():
+        return {"ok": True}
+
+    app.add_middleware(TokenBucketMiddleware, rate=1.0, burst=1)
+    metrics.install(app)
+
+    labels = {"path": "__other__", "method": "GET", "status": "429"}
+
+    def rejected():
+        return REGISTRY.get_sample_value("http_requests_total", labels) or 0.0
+
+    before = rejected()
+    async with _client(app) as c:
+        assert (await c.get("/limited")).status_code == 200
+        r = await c.get("/limited")
+        assert r.status_code == 429
+        assert r.json()["title"] == "Too Many Requests"
+    assert rejected() == before + 1
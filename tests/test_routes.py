@@ -12,7 +12,7 @@ from app import crud
 def test_characters_route_sorted_by_name(monkeypatch):
     """Return results sorted by name ASC with correct total_count."""
 
-    async def fake_list(session, sort, order, page, page_size):
+    async def fake_list(session, sort, order, page, page_size, **kw):
         rows = [{"id": 2, "name": "Beth"}, {"id": 1, "name": "Alice"}]
         rows = sorted(rows, key=lambda x: x["name"].lower(), reverse=(order == "desc"))
         total = 2